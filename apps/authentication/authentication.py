@@ -1,10 +1,13 @@
 """
 Custom JWT authentication with blacklist support
 """
+from django.utils.translation import gettext_lazy as _
 from rest_framework_simplejwt.authentication import JWTAuthentication
-from rest_framework_simplejwt.exceptions import InvalidToken, TokenError
+from rest_framework_simplejwt.exceptions import AuthenticationFailed, InvalidToken, TokenError
+from rest_framework_simplejwt.settings import api_settings
 from rest_framework_simplejwt.token_blacklist.models import BlacklistedToken
 from rest_framework_simplejwt.tokens import AccessToken
+from rest_framework_simplejwt.utils import get_md5_hash_password
 
 
 class BlacklistAwareJWTAuthentication(JWTAuthentication):
@@ -42,6 +45,39 @@ class BlacklistAwareJWTAuthentication(JWTAuthentication):
             'messages': messages,
         })
     
+    def get_user(self, validated_token):
+        """
+        Load the user for a validated token with its role annotated, so later
+        role checks need no reverse one-to-one queries. Mirrors simplejwt's
+        get_user, including its active-user and revoked-token checks.
+        """
+        try:
+            user_id = validated_token[api_settings.USER_ID_CLAIM]
+        except KeyError as e:
+            raise InvalidToken(
+                _("Token contained no recognizable user identification")
+            ) from e
+        
+        try:
+            user = self.user_model.objects.with_role().get(**{api_settings.USER_ID_FIELD: user_id})
+        except self.user_model.DoesNotExist as e:
+            raise AuthenticationFailed(
+                _("User not found"), code="user_not_found"
+            ) from e
+        
+        if api_settings.CHECK_USER_IS_ACTIVE and not user.is_active:
+            raise AuthenticationFailed(_("User is inactive"), code="user_inactive")
+        
+        if api_settings.CHECK_REVOKE_TOKEN:
+            if validated_token.get(
+                api_settings.REVOKE_TOKEN_CLAIM
+            ) != get_md5_hash_password(user.password):
+                raise AuthenticationFailed(
+                    _("The user's password has been changed."), code="password_changed"
+                )
+        
+        return user
+    
     def get_auth_token_classes(self):
         """
         Return the token classes that this authentication class supports.
@@ -260,7 +260,7 @@ class ProfessorRegistrationSerializer(serializers.ModelSerializer):
         import os
         import uuid
         from django.conf import settings
-        from minio import Minio
+        from apps.files.services import get_minio_client
         from minio.error import S3Error
         
         # Generate unique filename
@@ -274,24 +274,7 @@ class ProfessorRegistrationSerializer(serializers.ModelSerializer):
             storage_path = f"professors/profile_pictures/{filename}"
         
         try:
-            # Initialize MinIO client
-            endpoint_url = settings.MINIO_ENDPOINT_URL
-            if endpoint_url.startswith('http://'):
-                endpoint = endpoint_url.replace('http://', '')
-                secure = False
-            elif endpoint_url.startswith('https://'):
-                endpoint = endpoint_url.replace('https://', '')
-                secure = True
-            else:
-                endpoint = endpoint_url
-                secure = settings.MINIO_USE_HTTPS
-            
-            minio_client = Minio(
-                endpoint=endpoint,
-                access_key=settings.MINIO_ACCESS_KEY,
-                secret_key=settings.MINIO_SECRET_KEY,
-                secure=secure,
-            )
+            minio_client = get_minio_client()
             
             # Ensure bucket exists
             bucket_name = settings.MINIO_STORAGE_BUCKET_NAME
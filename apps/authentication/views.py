@@ -45,7 +45,7 @@ from core.permissions import IsAdminUser, IsProfessorUser, IsStudentUser
 from apps.users.models import Student, Professor, Admin
 from django.http import HttpResponse, Http404
 from django.conf import settings
-from minio import Minio
+from apps.files.services import get_minio_client
 from minio.error import S3Error
 import os
 
@@ -835,24 +835,7 @@ def download_professor_cv(request, professor_id):
                 'error': 'CV not found for this professor'
             }, status=status.HTTP_404_NOT_FOUND)
         
-        # Initialize MinIO client
-        endpoint_url = settings.MINIO_ENDPOINT_URL
-        if endpoint_url.startswith('http://'):
-            endpoint = endpoint_url.replace('http://', '')
-            secure = False
-        elif endpoint_url.startswith('https://'):
-            endpoint = endpoint_url.replace('https://', '')
-            secure = True
-        else:
-            endpoint = endpoint_url
-            secure = settings.MINIO_USE_HTTPS
-        
-        minio_client = Minio(
-            endpoint=endpoint,
-            access_key=settings.MINIO_ACCESS_KEY,
-            secret_key=settings.MINIO_SECRET_KEY,
-            secure=secure,
-        )
+        minio_client = get_minio_client()
         
         # Extract object name from the stored path
         # Path format: http://localhost:9000/sauvini/professors/cv/filename.pdf
@@ -930,24 +913,7 @@ def get_professor_cv_url(request, professor_id):
                 'error': 'CV not found for this professor'
             }, status=status.HTTP_404_NOT_FOUND)
         
-        # Initialize MinIO client
-        endpoint_url = settings.MINIO_ENDPOINT_URL
-        if endpoint_url.startswith('http://'):
-            endpoint = endpoint_url.replace('http://', '')
-            secure = False
-        elif endpoint_url.startswith('https://'):
-            endpoint = endpoint_url.replace('https://', '')
-            secure = True
-        else:
-            endpoint = endpoint_url
-            secure = settings.MINIO_USE_HTTPS
-        
-        minio_client = Minio(
-            endpoint=endpoint,
-            access_key=settings.MINIO_ACCESS_KEY,
-            secret_key=settings.MINIO_SECRET_KEY,
-            secure=secure,
-        )
+        minio_client = get_minio_client()
         
         # Extract object name from the stored path
         bucket_name = settings.MINIO_STORAGE_BUCKET_NAME
@@ -0,0 +1,33 @@
+"""
+Short-lived cache for course reference data (module and academic stream lists)
+"""
+import hashlib
+import json
+
+from django.core.cache import cache
+from rest_framework.utils.encoders import JSONEncoder
+
+MODULES_CACHE_KEY = 'courses:modules:v1'
+ACADEMIC_STREAMS_CACHE_KEY = 'courses:academic_streams:v1'
+REFERENCE_DATA_KEYS = (MODULES_CACHE_KEY, ACADEMIC_STREAMS_CACHE_KEY)
+
+# Queryset .update()/bulk writes skip the invalidation signals, so entries expire quickly
+CACHE_TTL = 60
+
+
+def cached_payload(key, build):
+    """
+    Return (etag, data) for key. On a miss, build() is called and the result is
+    cached for CACHE_TTL seconds with an ETag derived from its JSON encoding.
+    """
+    def build_entry():
+        data = build()
+        encoded = json.dumps(data, cls=JSONEncoder, sort_keys=True).encode()
+        return f'"{hashlib.sha1(encoded).hexdigest()}"', data
+    
+    return cache.get_or_set(key, build_entry, CACHE_TTL)
+
+
+def invalidate_reference_data():
+    """Drop the cached module and academic stream lists"""
+    cache.delete_many(REFERENCE_DATA_KEYS)
@@ -2,10 +2,42 @@
 Django management command to clean up academic streams to only keep the 6 specified ones
 and convert their names to English
 """
+import uuid
+
 from django.core.management.base import BaseCommand
 from django.db import transaction
 from apps.courses.models import AcademicStream, Module, Chapter, Lesson
 
+# The 6 streams to keep with their English names
+STREAMS_TO_KEEP = {
+    uuid.UUID("1c6492de-a922-4afa-9e68-030395e01e40"): {
+        "name": "Experimental Sciences",
+        "name_ar": "علوم تجريبية"
+    },
+    uuid.UUID("1d161706-7833-4e14-9ce8-1653a70ac862"): {
+        "name": "Technical Mathematics",
+        "name_ar": "تقني رياضي"
+    },
+    uuid.UUID("1f3bab99-641b-40dc-854f-0bf4c0d3d9fa"): {
+        "name": "Mathematics",
+        "name_ar": "رياضيات"
+    },
+    uuid.UUID("4a25face-9d68-48ef-a331-8c017c10b2bf"): {
+        "name": "Natural Sciences",
+        "name_ar": "علوم طبيعية"
+    },
+    uuid.UUID("5372521f-4cc5-4c46-9ecd-d21a73e12ab6"): {
+        "name": "Literature and Philosophy",
+        "name_ar": "اداب و فلسفة"
+    },
+    uuid.UUID("9b9af5e7-186b-4216-9e23-7918de756386"): {
+        "name": "Management and Economics",
+        "name_ar": "تسيير و اقتصاد"
+    }
+}
+
+_KEEP_IDS = frozenset(STREAMS_TO_KEEP)
+
 
 class Command(BaseCommand):
     help = 'Clean up academic streams to keep only 6 specified ones and convert names to English'
@@ -23,49 +55,23 @@ class Command(BaseCommand):
         if dry_run:
             self.stdout.write(self.style.WARNING('DRY RUN MODE - No changes will be made'))
         
-        # The 6 streams to keep with their English names
-        streams_to_keep = {
-            "1c6492de-a922-4afa-9e68-030395e01e40": {
-                "name": "Experimental Sciences",
-                "name_ar": "علوم تجريبية"
-            },
-            "1d161706-7833-4e14-9ce8-1653a70ac862": {
-                "name": "Technical Mathematics",
-                "name_ar": "تقني رياضي"
-            },
-            "1f3bab99-641b-40dc-854f-0bf4c0d3d9fa": {
-                "name": "Mathematics",
-                "name_ar": "رياضيات"
-            },
-            "4a25face-9d68-48ef-a331-8c017c10b2bf": {
-                "name": "Natural Sciences",
-                "name_ar": "علوم طبيعية"
-            },
-            "5372521f-4cc5-4c46-9ecd-d21a73e12ab6": {
-                "name": "Literature and Philosophy",
-                "name_ar": "اداب و فلسفة"
-            },
-            "9b9af5e7-186b-4216-9e23-7918de756386": {
-                "name": "Management and Economics",
-                "name_ar": "تسيير و اقتصاد"
-            }
-        }
-        
         self.stdout.write('Analyzing current academic streams...')
         
-        # Get all current streams
-        all_streams = AcademicStream.objects.all()
+        # Stream current rows in chunks, pulling only the columns we compare
+        all_streams = AcademicStream.objects.only('id', 'name', 'name_ar')
+        total_streams = 0
         streams_to_delete = []
         streams_to_update = []
         
         with transaction.atomic():
-            for stream in all_streams:
-                stream_id = str(stream.id)
+            for stream in all_streams.iterator(chunk_size=500):
+                total_streams += 1
+                stream_id = stream.id
                 
-                if stream_id in streams_to_keep:
+                if stream_id in _KEEP_IDS:
                     # This stream should be kept and updated
-                    new_name = streams_to_keep[stream_id]["name"]
-                    new_name_ar = streams_to_keep[stream_id]["name_ar"]
+                    new_name = STREAMS_TO_KEEP[stream_id]["name"]
+                    new_name_ar = STREAMS_TO_KEEP[stream_id]["name_ar"]
                     
                     if stream.name != new_name or stream.name_ar != new_name_ar:
                         streams_to_update.append({
@@ -137,8 +143,8 @@ class Command(BaseCommand):
                     )
                 )
                 
-                for stream in remaining_streams.order_by('name'):
-                    self.stdout.write(f'  📚 {stream.name} ({stream.name_ar})')
+                for name, name_ar in remaining_streams.order_by('name').values_list('name', 'name_ar'):
+                    self.stdout.write(f'  📚 {name} ({name_ar})')
                     
             else:
                 # Dry run summary
@@ -153,7 +159,7 @@ class Command(BaseCommand):
                         f'- Streams to update: {len(streams_to_update)}\n'
                         f'- Streams to delete: {len(streams_to_delete)}\n'
                         f'- Streams with relationships (would be skipped): {len(streams_with_relations)}\n'
-                        f'- Current total: {all_streams.count()}\n'
-                        f'- Would remain: {len(streams_to_keep)}'
+                        f'- Current total: {total_streams}\n'
+                        f'- Would remain: {len(STREAMS_TO_KEEP)}'
                     )
                 )
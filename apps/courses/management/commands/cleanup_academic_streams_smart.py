@@ -2,10 +2,61 @@
 Django management command to clean up academic streams to only keep the 6 specified ones
 and convert their names to English, while transferring relationships intelligently
 """
+import uuid
+
 from django.core.management.base import BaseCommand
 from django.db import transaction
 from apps.courses.models import AcademicStream, Module, Chapter, Lesson
 
+# The 6 streams to keep with their English names
+STREAMS_TO_KEEP = {
+    uuid.UUID("1c6492de-a922-4afa-9e68-030395e01e40"): {
+        "name": "Experimental Sciences",
+        "name_ar": "علوم تجريبية"
+    },
+    uuid.UUID("1d161706-7833-4e14-9ce8-1653a70ac862"): {
+        "name": "Technical Mathematics",
+        "name_ar": "تقني رياضي"
+    },
+    uuid.UUID("1f3bab99-641b-40dc-854f-0bf4c0d3d9fa"): {
+        "name": "Mathematics",
+        "name_ar": "رياضيات"
+    },
+    uuid.UUID("4a25face-9d68-48ef-a331-8c017c10b2bf"): {
+        "name": "Natural Sciences",
+        "name_ar": "علوم طبيعية"
+    },
+    uuid.UUID("5372521f-4cc5-4c46-9ecd-d21a73e12ab6"): {
+        "name": "Literature and Philosophy",
+        "name_ar": "اداب و فلسفة"
+    },
+    uuid.UUID("9b9af5e7-186b-4216-9e23-7918de756386"): {
+        "name": "Management and Economics",
+        "name_ar": "تسيير و اقتصاد"
+    }
+}
+
+# Mapping of streams to be deleted to streams to be kept (for relationship transfer)
+RELATIONSHIP_MAPPING = {
+    uuid.UUID("d9fe1211-f332-404e-823f-42c0186e298b"): uuid.UUID("1f3bab99-641b-40dc-854f-0bf4c0d3d9fa"),  # Mathematics -> Mathematics (Arabic)
+    uuid.UUID("be7f692e-bbc0-4fce-b18b-eb39df28bdc2"): uuid.UUID("4a25face-9d68-48ef-a331-8c017c10b2bf"),  # Physics -> Natural Sciences
+    uuid.UUID("ee96f947-b2a2-484e-b0dd-7f915a9366bd"): uuid.UUID("1c6492de-a922-4afa-9e68-030395e01e40"),  # Chemistry -> Experimental Sciences
+    uuid.UUID("0f4b0eea-554e-4b50-ab9c-cbacaefe867f"): uuid.UUID("4a25face-9d68-48ef-a331-8c017c10b2bf"),  # Biology -> Natural Sciences
+    uuid.UUID("6ba9ea1d-7ed5-4c4c-bddc-ca6f7e25908c"): uuid.UUID("1d161706-7833-4e14-9ce8-1653a70ac862"),  # Computer Science -> Technical Mathematics
+}
+
+_KEEP_IDS = frozenset(STREAMS_TO_KEEP)
+
+# Auto-created M2M through tables linking content to academic streams, with the
+# column holding the content side of each link
+STREAM_THROUGH_MODELS = (
+    (Module.academic_streams.through, 'module_id'),
+    (Chapter.academic_streams.through, 'chapter_id'),
+    (Lesson.academic_streams.through, 'lesson_id'),
+)
+
+TRANSFER_CHUNK_SIZE = 1000
+
 
 class Command(BaseCommand):
     help = 'Clean up academic streams to keep only 6 specified ones and convert names to English'
@@ -23,59 +74,24 @@ class Command(BaseCommand):
         if dry_run:
             self.stdout.write(self.style.WARNING('DRY RUN MODE - No changes will be made'))
         
-        # The 6 streams to keep with their English names
-        streams_to_keep = {
-            "1c6492de-a922-4afa-9e68-030395e01e40": {
-                "name": "Experimental Sciences",
-                "name_ar": "علوم تجريبية"
-            },
-            "1d161706-7833-4e14-9ce8-1653a70ac862": {
-                "name": "Technical Mathematics", 
-                "name_ar": "تقني رياضي"
-            },
-            "1f3bab99-641b-40dc-854f-0bf4c0d3d9fa": {
-                "name": "Mathematics",
-                "name_ar": "رياضيات"
-            },
-            "4a25face-9d68-48ef-a331-8c017c10b2bf": {
-                "name": "Natural Sciences",
-                "name_ar": "علوم طبيعية"
-            },
-            "5372521f-4cc5-4c46-9ecd-d21a73e12ab6": {
-                "name": "Literature and Philosophy",
-                "name_ar": "اداب و فلسفة"
-            },
-            "9b9af5e7-186b-4216-9e23-7918de756386": {
-                "name": "Management and Economics",
-                "name_ar": "تسيير و اقتصاد"
-            }
-        }
-        
-        # Mapping of streams to be deleted to streams to be kept (for relationship transfer)
-        relationship_mapping = {
-            "d9fe1211-f332-404e-823f-42c0186e298b": "1f3bab99-641b-40dc-854f-0bf4c0d3d9fa",  # Mathematics -> Mathematics (Arabic)
-            "be7f692e-bbc0-4fce-b18b-eb39df28bdc2": "4a25face-9d68-48ef-a331-8c017c10b2bf",  # Physics -> Natural Sciences
-            "ee96f947-b2a2-484e-b0dd-7f915a9366bd": "1c6492de-a922-4afa-9e68-030395e01e40",  # Chemistry -> Experimental Sciences
-            "0f4b0eea-554e-4b50-ab9c-cbacaefe867f": "4a25face-9d68-48ef-a331-8c017c10b2bf",  # Biology -> Natural Sciences
-            "6ba9ea1d-7ed5-4c4c-bddc-ca6f7e25908c": "1d161706-7833-4e14-9ce8-1653a70ac862",  # Computer Science -> Technical Mathematics
-        }
-        
         self.stdout.write('Analyzing current academic streams...')
         
-        # Get all current streams
-        all_streams = AcademicStream.objects.all()
+        # Stream current rows in chunks, pulling only the columns we compare
+        all_streams = AcademicStream.objects.only('id', 'name', 'name_ar')
+        total_streams = 0
         streams_to_delete = []
         streams_to_update = []
         relationships_to_transfer = []
         
         with transaction.atomic():
-            for stream in all_streams:
-                stream_id = str(stream.id)
+            for stream in all_streams.iterator(chunk_size=500):
+                total_streams += 1
+                stream_id = stream.id
                 
-                if stream_id in streams_to_keep:
+                if stream_id in _KEEP_IDS:
                     # This stream should be kept and updated
-                    new_name = streams_to_keep[stream_id]["name"]
-                    new_name_ar = streams_to_keep[stream_id]["name_ar"]
+                    new_name = STREAMS_TO_KEEP[stream_id]["name"]
+                    new_name_ar = STREAMS_TO_KEEP[stream_id]["name_ar"]
                     
                     if stream.name != new_name or stream.name_ar != new_name_ar:
                         streams_to_update.append({
@@ -89,8 +105,8 @@ class Command(BaseCommand):
                     streams_to_delete.append(stream)
                     
                     # Check if we need to transfer relationships
-                    if stream_id in relationship_mapping:
-                        target_stream_id = relationship_mapping[stream_id]
+                    if stream_id in RELATIONSHIP_MAPPING:
+                        target_stream_id = RELATIONSHIP_MAPPING[stream_id]
                         target_stream = AcademicStream.objects.get(id=target_stream_id)
                         relationships_to_transfer.append({
                             'from_stream': stream,
@@ -151,26 +167,7 @@ class Command(BaseCommand):
                     from_stream = transfer['from_stream']
                     to_stream = transfer['to_stream']
                     
-                    # Transfer module relationships
-                    modules = Module.objects.filter(academic_streams=from_stream)
-                    for module in modules:
-                        module.academic_streams.remove(from_stream)
-                        module.academic_streams.add(to_stream)
-                        transferred_count += 1
-                    
-                    # Transfer chapter relationships
-                    chapters = Chapter.objects.filter(academic_streams=from_stream)
-                    for chapter in chapters:
-                        chapter.academic_streams.remove(from_stream)
-                        chapter.academic_streams.add(to_stream)
-                        transferred_count += 1
-                    
-                    # Transfer lesson relationships
-                    lessons = Lesson.objects.filter(academic_streams=from_stream)
-                    for lesson in lessons:
-                        lesson.academic_streams.remove(from_stream)
-                        lesson.academic_streams.add(to_stream)
-                        transferred_count += 1
+                    transferred_count += self.transfer_stream_links(from_stream.id, to_stream.id)
                     
                     self.stdout.write(f'Transferred relationships: {from_stream.name} → {to_stream.name}')
                 
@@ -202,8 +199,8 @@ class Command(BaseCommand):
                     )
                 )
                 
-                for stream in remaining_streams.order_by('name'):
-                    self.stdout.write(f'  📚 {stream.name} ({stream.name_ar})')
+                for name, name_ar in remaining_streams.order_by('name').values_list('name', 'name_ar'):
+                    self.stdout.write(f'  📚 {name} ({name_ar})')
                     
             else:
                 # Dry run summary
@@ -213,7 +210,39 @@ class Command(BaseCommand):
                         f'- Streams to update: {len(streams_to_update)}\n'
                         f'- Relationships to transfer: {len(relationships_to_transfer)}\n'
                         f'- Streams to delete: {len(streams_to_delete)}\n'
-                        f'- Current total: {all_streams.count()}\n'
-                        f'- Would remain: {len(streams_to_keep)}'
+                        f'- Current total: {total_streams}\n'
+                        f'- Would remain: {len(STREAMS_TO_KEEP)}'
                     )
                 )
+
+    def transfer_stream_links(self, from_stream_id, to_stream_id):
+        """
+        Move every through-table link from one stream to another with bulk
+        UPDATEs, TRANSFER_CHUNK_SIZE objects at a time. Objects already linked to
+        the target stream just lose the old link. Returns the number of links moved.
+        """
+        transferred = 0
+        for through, object_column in STREAM_THROUGH_MODELS:
+            # Ids are collected before rewriting the rows they come from
+            object_ids = list(
+                through.objects.filter(academicstream_id=from_stream_id)
+                .values_list(object_column, flat=True)
+            )
+            for start in range(0, len(object_ids), TRANSFER_CHUNK_SIZE):
+                chunk = object_ids[start:start + TRANSFER_CHUNK_SIZE]
+                already_linked = set(
+                    through.objects.filter(
+                        academicstream_id=to_stream_id, **{f'{object_column}__in': chunk}
+                    ).values_list(object_column, flat=True)
+                )
+                through.objects.filter(
+                    academicstream_id=from_stream_id,
+                    **{f'{object_column}__in': [i for i in chunk if i not in already_linked]}
+                ).update(academicstream_id=to_stream_id)
+                if already_linked:
+                    through.objects.filter(
+                        academicstream_id=from_stream_id,
+                        **{f'{object_column}__in': already_linked}
+                    ).delete()
+                transferred += len(chunk)
+        return transferred
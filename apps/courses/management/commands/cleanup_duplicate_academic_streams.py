@@ -4,9 +4,18 @@ Preserves streams with relationships and merges them into the most connected str
 """
 from django.core.management.base import BaseCommand
 from django.db import transaction
+from django.db.models import Count, IntegerField, Value
 from apps.courses.models import AcademicStream, Module, Chapter, Lesson
 from collections import defaultdict
 
+# Auto-created M2M through tables linking content to academic streams, with the
+# column holding the content side of each link
+STREAM_THROUGH_MODELS = (
+    (Module.academic_streams.through, 'module_id'),
+    (Chapter.academic_streams.through, 'chapter_id'),
+    (Lesson.academic_streams.through, 'lesson_id'),
+)
+
 
 class Command(BaseCommand):
     help = 'Safely clean up duplicate academic streams while preserving relationships'
@@ -26,15 +35,31 @@ class Command(BaseCommand):
         
         self.stdout.write('Analyzing academic streams for duplicates...')
         
-        # Group streams by name to find duplicates
+        # Let the database find duplicated names, then load only those rows
+        duplicate_names = (
+            AcademicStream.objects.values('name')
+            .annotate(name_count=Count('id'))
+            .filter(name_count__gt=1)
+            .values_list('name', flat=True)
+        )
         streams_by_name = defaultdict(list)
-        all_streams = AcademicStream.objects.all()
+        duplicate_streams = AcademicStream.objects.filter(
+            name__in=list(duplicate_names)
+        ).only('id', 'name')
         
-        for stream in all_streams:
+        for stream in duplicate_streams.iterator(chunk_size=2000):
             streams_by_name[stream.name].append(stream)
         
+        # Relationship counts for every duplicated stream, one GROUP BY per through table
+        duplicate_ids = [
+            stream.id
+            for streams in streams_by_name.values() if len(streams) > 1
+            for stream in streams
+        ]
+        link_counts = self.count_stream_links(duplicate_ids)
+        
         duplicates_found = 0
-        streams_to_delete = []
+        streams_to_delete = {}
         relationships_transferred = 0
         
         with transaction.atomic():
@@ -46,9 +71,7 @@ class Command(BaseCommand):
                     # Calculate relationship counts for each stream
                     stream_relationships = []
                     for stream in streams:
-                        module_count = Module.objects.filter(academic_streams=stream).count()
-                        chapter_count = Chapter.objects.filter(academic_streams=stream).count()
-                        lesson_count = Lesson.objects.filter(academic_streams=stream).count()
+                        module_count, chapter_count, lesson_count = link_counts[stream.id]
                         total_relationships = module_count + chapter_count + lesson_count
                         
                         stream_relationships.append({
@@ -74,41 +97,25 @@ class Command(BaseCommand):
                     
                     if not dry_run:
                         # Transfer relationships from duplicates to keeper
-                        for duplicate in duplicates:
-                            # Transfer module relationships
-                            modules = Module.objects.filter(academic_streams=duplicate)
-                            for module in modules:
-                                module.academic_streams.remove(duplicate)
-                                module.academic_streams.add(keeper)
-                                relationships_transferred += 1
-                            
-                            # Transfer chapter relationships
-                            chapters = Chapter.objects.filter(academic_streams=duplicate)
-                            for chapter in chapters:
-                                chapter.academic_streams.remove(duplicate)
-                                chapter.academic_streams.add(keeper)
-                                relationships_transferred += 1
-                            
-                            # Transfer lesson relationships
-                            lessons = Lesson.objects.filter(academic_streams=duplicate)
-                            for lesson in lessons:
-                                lesson.academic_streams.remove(duplicate)
-                                lesson.academic_streams.add(keeper)
-                                relationships_transferred += 1
-                            
-                            # Mark for deletion
-                            streams_to_delete.append(duplicate)
+                        relationships_transferred += self.merge_stream_links(
+                            keeper.id, [d.id for d in duplicates]
+                        )
                     
-                    streams_to_delete.extend(duplicates)
+                    # Mark for deletion (also drives the dry-run summary)
+                    streams_to_delete.update((d.pk, d) for d in duplicates)
+            
+            # Delete duplicates in the same transaction as the relationship transfer
+            deleted_count = 0
+            if not dry_run and streams_to_delete:
+                audit = [(stream.name, stream.id) for stream in streams_to_delete.values()]
+                _, deleted_per_model = AcademicStream.objects.filter(
+                    pk__in=list(streams_to_delete)
+                ).delete()
+                deleted_count = deleted_per_model.get(AcademicStream._meta.label, 0)
+                for name, stream_id in audit:
+                    self.stdout.write(f'Deleted duplicate: {name} ({stream_id})')
         
-        # Delete duplicates
         if streams_to_delete and not dry_run:
-            deleted_count = 0
-            for stream in streams_to_delete:
-                stream.delete()
-                deleted_count += 1
-                self.stdout.write(f'Deleted duplicate: {stream.name} ({stream.id})')
-            
             self.stdout.write(
                 self.style.SUCCESS(
                     f'\nCleanup completed!\n'
@@ -134,3 +141,50 @@ class Command(BaseCommand):
                     f'- Total streams: {AcademicStream.objects.count()}'
                 )
             )
+
+    def count_stream_links(self, stream_ids):
+        """
+        Return {stream_id: (module_count, chapter_count, lesson_count)} from a single
+        UNION ALL of one grouped COUNT per through table, tagged with the table's
+        position, instead of three COUNTs per stream.
+        """
+        counts = {stream_id: [0, 0, 0] for stream_id in stream_ids}
+        if not counts:
+            return {}
+        per_table = [
+            through.objects.filter(academicstream_id__in=stream_ids)
+            .values('academicstream_id')
+            .annotate(position=Value(position, output_field=IntegerField()), total=Count('id'))
+            .values_list('position', 'academicstream_id', 'total')
+            for position, (through, _) in enumerate(STREAM_THROUGH_MODELS)
+        ]
+        for position, stream_id, total in per_table[0].union(*per_table[1:], all=True):
+            counts[stream_id][position] = total
+        return {stream_id: tuple(values) for stream_id, values in counts.items()}
+
+    def merge_stream_links(self, keeper_id, duplicate_ids):
+        """
+        Repoint every through-table row from the duplicate streams to the keeper.
+        Issues one UPDATE per duplicate per through table, regardless of how many
+        rows are linked. Rows whose object is already linked to the keeper are
+        dropped instead, so the (object, stream) unique constraint holds.
+        The keeper's links are read up front because MySQL rejects an UPDATE
+        whose subquery selects from the table being updated.
+        """
+        transferred = 0
+        for through, object_column in STREAM_THROUGH_MODELS:
+            for duplicate_id in duplicate_ids:
+                already_linked = list(
+                    through.objects.filter(academicstream_id=keeper_id)
+                    .values_list(object_column, flat=True)
+                )
+                transferred += through.objects.filter(
+                    academicstream_id=duplicate_id
+                ).exclude(
+                    **{f'{object_column}__in': already_linked}
+                ).update(academicstream_id=keeper_id)
+            
+            # Whatever is left was a link the keeper already had
+            merged, _ = through.objects.filter(academicstream_id__in=duplicate_ids).delete()
+            transferred += merged
+        return transferred
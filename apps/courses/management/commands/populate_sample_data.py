@@ -2,12 +2,14 @@
 Django management command to populate sample data
 """
 from django.core.management.base import BaseCommand
+from django.db import transaction
 from apps.courses.models import AcademicStream, Module, Chapter, Lesson
 
 
 class Command(BaseCommand):
     help = 'Populate database with sample academic data'
 
+    @transaction.atomic
     def handle(self, *args, **options):
         self.stdout.write('Creating sample academic data...')
         
@@ -20,15 +22,22 @@ class Command(BaseCommand):
             {'name': 'Computer Science', 'name_ar': 'علوم الحاسوب'},
         ]
         
-        streams = []
-        for stream_data in streams_data:
-            stream, created = AcademicStream.objects.get_or_create(
-                name=stream_data['name'],
-                defaults={'name_ar': stream_data['name_ar']}
-            )
-            streams.append(stream)
-            if created:
-                self.stdout.write(f'Created academic stream: {stream.name}')
+        stream_names = [d['name'] for d in streams_data]
+        existing_names = set(
+            AcademicStream.objects.filter(name__in=stream_names).values_list('name', flat=True)
+        )
+        new_streams = [
+            AcademicStream(name=d['name'], name_ar=d['name_ar'])
+            for d in streams_data if d['name'] not in existing_names
+        ]
+        # Names are unique, so a stream inserted concurrently is simply skipped;
+        # ids are generated client-side, so re-reading them tells which rows landed
+        AcademicStream.objects.bulk_create(new_streams, ignore_conflicts=True)
+        created_names = AcademicStream.objects.filter(
+            pk__in=[stream.pk for stream in new_streams]
+        ).values_list('name', flat=True)
+        for name in created_names:
+            self.stdout.write(f'Created academic stream: {name}')
         
         # Create modules
         modules_data = [
@@ -64,24 +73,36 @@ class Command(BaseCommand):
             }
         ]
         
-        modules = []
-        for module_data in modules_data:
-            module, created = Module.objects.get_or_create(
-                name=module_data['name'],
-                defaults={
-                    'description': module_data['description'],
-                    'color': module_data['color']
-                }
-            )
-            
-            # Add academic streams
-            for stream_name in module_data['academic_streams']:
-                stream = AcademicStream.objects.get(name=stream_name)
-                module.academic_streams.add(stream)
-            
-            modules.append(module)
-            if created:
-                self.stdout.write(f'Created module: {module.name}')
+        modules_by_name = {
+            module.name: module
+            for module in Module.objects.filter(name__in=[d['name'] for d in modules_data])
+        }
+        new_modules = [
+            Module(name=d['name'], description=d['description'], color=d['color'])
+            for d in modules_data if d['name'] not in modules_by_name
+        ]
+        Module.objects.bulk_create(new_modules)
+        for module in new_modules:
+            modules_by_name[module.name] = module
+            self.stdout.write(f'Created module: {module.name}')
+        modules = [modules_by_name[d['name']] for d in modules_data]
+        
+        # Resolve every stream the modules reference with one query
+        needed_streams = {name for d in modules_data for name in d['academic_streams']}
+        stream_ids_by_name = dict(
+            AcademicStream.objects.filter(name__in=needed_streams).values_list('name', 'id')
+        )
+        
+        # Add academic streams with one INSERT; links that already exist are skipped
+        ModuleStream = Module.academic_streams.through
+        ModuleStream.objects.bulk_create(
+            [
+                ModuleStream(module_id=modules_by_name[d['name']].id, academicstream_id=stream_ids_by_name[stream_name])
+                for d in modules_data
+                for stream_name in d['academic_streams']
+            ],
+            ignore_conflicts=True
+        )
         
         # Create chapters for the first module (الجبر الأساسي)
         algebra_module = modules[0]
@@ -103,19 +124,21 @@ class Command(BaseCommand):
             }
         ]
         
-        chapters = []
-        for chapter_data in chapters_data:
-            chapter, created = Chapter.objects.get_or_create(
-                name=chapter_data['name'],
-                module=algebra_module,
-                defaults={
-                    'description': chapter_data['description'],
-                    'price': chapter_data['price']
-                }
+        chapters_by_name = {
+            chapter.name: chapter
+            for chapter in Chapter.objects.filter(
+                module=algebra_module, name__in=[d['name'] for d in chapters_data]
             )
-            chapters.append(chapter)
-            if created:
-                self.stdout.write(f'Created chapter: {chapter.name}')
+        }
+        new_chapters = [
+            Chapter(name=d['name'], module=algebra_module, description=d['description'], price=d['price'])
+            for d in chapters_data if d['name'] not in chapters_by_name
+        ]
+        Chapter.objects.bulk_create(new_chapters)
+        for chapter in new_chapters:
+            chapters_by_name[chapter.name] = chapter
+            self.stdout.write(f'Created chapter: {chapter.name}')
+        chapters = [chapters_by_name[d['name']] for d in chapters_data]
         
         # Create lessons for the first chapter
         intro_chapter = chapters[0]
@@ -134,18 +157,24 @@ class Command(BaseCommand):
             }
         ]
         
-        for lesson_data in lessons_data:
-            lesson, created = Lesson.objects.get_or_create(
-                title=lesson_data['title'],
+        existing_titles = set(
+            Lesson.objects.filter(
+                chapter=intro_chapter, title__in=[d['title'] for d in lessons_data]
+            ).values_list('title', flat=True)
+        )
+        new_lessons = [
+            Lesson(
+                title=d['title'],
                 chapter=intro_chapter,
-                defaults={
-                    'description': lesson_data['description'],
-                    'duration': lesson_data['duration'],
-                    'order': lesson_data['order']
-                }
+                description=d['description'],
+                duration=d['duration'],
+                order=d['order']
             )
-            if created:
-                self.stdout.write(f'Created lesson: {lesson.title}')
+            for d in lessons_data if d['title'] not in existing_titles
+        ]
+        Lesson.objects.bulk_create(new_lessons)
+        for lesson in new_lessons:
+            self.stdout.write(f'Created lesson: {lesson.title}')
         
         self.stdout.write(
             self.style.SUCCESS('Successfully populated sample data!')
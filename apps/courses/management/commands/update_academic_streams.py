@@ -3,12 +3,15 @@ Django management command to update academic streams
 Adds missing streams and removes duplicates
 """
 from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Count
 from apps.courses.models import AcademicStream
 
 
 class Command(BaseCommand):
     help = 'Update academic streams - add missing ones and remove duplicates'
 
+    @transaction.atomic
     def handle(self, *args, **options):
         self.stdout.write('Updating academic streams...')
         
@@ -33,11 +36,19 @@ class Command(BaseCommand):
         
         # First, find and remove duplicates
         self.stdout.write('Checking for duplicates...')
-        all_streams = AcademicStream.objects.all()
+        duplicate_names = (
+            AcademicStream.objects.values('name')
+            .annotate(name_count=Count('id'))
+            .filter(name_count__gt=1)
+            .values_list('name', flat=True)
+        )
+        duplicate_streams = AcademicStream.objects.filter(
+            name__in=list(duplicate_names)
+        ).only('id', 'name')
         seen_names = set()
         duplicates_to_delete = []
         
-        for stream in all_streams:
+        for stream in duplicate_streams.iterator(chunk_size=2000):
             if stream.name in seen_names:
                 duplicates_to_delete.append(stream)
                 duplicate_count += 1
@@ -45,29 +56,46 @@ class Command(BaseCommand):
             else:
                 seen_names.add(stream.name)
         
-        # Delete duplicates
-        for duplicate in duplicates_to_delete:
-            duplicate.delete()
-            self.stdout.write(f'Deleted duplicate: {duplicate.name}')
+        # Delete duplicates with one DELETE per table
+        if duplicates_to_delete:
+            deleted_names = [duplicate.name for duplicate in duplicates_to_delete]
+            AcademicStream.objects.filter(pk__in=[d.pk for d in duplicates_to_delete]).delete()
+            for name in deleted_names:
+                self.stdout.write(f'Deleted duplicate: {name}')
         
         # Add or update streams
+        existing_streams = {
+            stream.name: stream
+            for stream in AcademicStream.objects.filter(name__in=[d['name'] for d in streams_data])
+        }
+        streams_to_create = []
+        streams_to_update = []
         for stream_data in streams_data:
-            stream, created = AcademicStream.objects.get_or_create(
-                name=stream_data['name'],
-                defaults={'name_ar': stream_data['name_ar']}
-            )
+            stream = existing_streams.get(stream_data['name'])
             
-            if created:
-                created_count += 1
-                self.stdout.write(f'Created academic stream: {stream.name}')
+            if stream is None:
+                streams_to_create.append(AcademicStream(**stream_data))
             else:
                 # Update name_ar if it's different
                 if stream.name_ar != stream_data['name_ar']:
                     stream.name_ar = stream_data['name_ar']
-                    stream.save()
+                    streams_to_update.append(stream)
                     updated_count += 1
                     self.stdout.write(f'Updated academic stream: {stream.name}')
         
+        # Only name_ar changes, so write just that column for all changed rows
+        AcademicStream.objects.bulk_update(streams_to_update, ['name_ar'], batch_size=500)
+        
+        # Names are unique, so a stream inserted concurrently is simply skipped;
+        # ids are generated client-side, so re-reading them tells which rows landed
+        AcademicStream.objects.bulk_create(streams_to_create, ignore_conflicts=True)
+        created_names = AcademicStream.objects.filter(
+            pk__in=[stream.pk for stream in streams_to_create]
+        ).values_list('name', flat=True)
+        for name in created_names:
+            created_count += 1
+            self.stdout.write(f'Created academic stream: {name}')
+        
         # Summary
         self.stdout.write(
             self.style.SUCCESS(
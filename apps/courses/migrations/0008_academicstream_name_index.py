@@ -0,0 +1,17 @@
+# Generated by Django 5.2.7 on 2026-10-15 09:12
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('courses', '0007_add_file_references_to_lesson'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='academicstream',
+            index=models.Index(fields=['name'], name='academic_streams_name_idx'),
+        ),
+    ]
@@ -0,0 +1,92 @@
+# Generated by Django 5.2.7 on 2026-10-15 09:40
+
+from collections import Counter, defaultdict
+
+from django.db import migrations, models
+from django.db.models import Count
+
+# Models linking to academic streams, with the through-table column holding their side
+STREAM_LINKS = (
+    ('courses', 'Module', 'module_id'),
+    ('courses', 'Chapter', 'chapter_id'),
+    ('courses', 'Lesson', 'lesson_id'),
+    ('lives', 'Live', 'live_id'),
+)
+
+
+def merge_duplicate_streams(apps, schema_editor):
+    """
+    Fold streams sharing a name into the most linked one, as
+    cleanup_duplicate_academic_streams does, so the unique constraint can be added
+    """
+    AcademicStream = apps.get_model('courses', 'AcademicStream')
+    throughs = [
+        (apps.get_model(app_label, model_name).academic_streams.through, object_column)
+        for app_label, model_name, object_column in STREAM_LINKS
+    ]
+
+    duplicate_names = (
+        AcademicStream.objects.values('name')
+        .annotate(name_count=Count('id'))
+        .filter(name_count__gt=1)
+        .values_list('name', flat=True)
+    )
+    streams_by_name = defaultdict(list)
+    for stream_id, name in AcademicStream.objects.filter(
+        name__in=list(duplicate_names)
+    ).values_list('id', 'name'):
+        streams_by_name[name].append(stream_id)
+    if not streams_by_name:
+        return
+
+    link_counts = Counter()
+    stream_ids = [stream_id for ids in streams_by_name.values() for stream_id in ids]
+    for through, _ in throughs:
+        link_counts.update(dict(
+            through.objects.filter(academicstream_id__in=stream_ids)
+            .values('academicstream_id')
+            .annotate(total=Count('id'))
+            .values_list('academicstream_id', 'total')
+        ))
+
+    duplicate_ids = []
+    for ids in streams_by_name.values():
+        ids.sort(key=lambda stream_id: link_counts[stream_id], reverse=True)
+        keeper_id, duplicates = ids[0], ids[1:]
+        for through, object_column in throughs:
+            # One duplicate at a time, so two duplicates linked to the same object
+            # never both move onto the keeper
+            for duplicate_id in duplicates:
+                already_linked = list(
+                    through.objects.filter(academicstream_id=keeper_id)
+                    .values_list(object_column, flat=True)
+                )
+                through.objects.filter(
+                    academicstream_id=duplicate_id
+                ).exclude(
+                    **{f'{object_column}__in': already_linked}
+                ).update(academicstream_id=keeper_id)
+            through.objects.filter(academicstream_id__in=duplicates).delete()
+        duplicate_ids.extend(duplicates)
+
+    AcademicStream.objects.filter(pk__in=duplicate_ids).delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('courses', '0008_academicstream_name_index'),
+        ('lives', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.RunPython(merge_duplicate_streams, migrations.RunPython.noop),
+        migrations.RemoveIndex(
+            model_name='academicstream',
+            name='academic_streams_name_idx',
+        ),
+        migrations.AddConstraint(
+            model_name='academicstream',
+            constraint=models.UniqueConstraint(fields=('name',), name='uniq_academicstream_name'),
+        ),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 5.2.7 on 2026-10-15 10:05
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('courses', '0009_academicstream_unique_name'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='lesson',
+            index=models.Index(fields=['chapter', 'order'], name='lessons_chapter_order_idx'),
+        ),
+    ]
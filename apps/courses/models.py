@@ -14,6 +14,9 @@ class AcademicStream(models.Model):
     
     class Meta:
         db_table = 'academic_streams'
+        constraints = [
+            models.UniqueConstraint(fields=['name'], name='uniq_academicstream_name'),
+        ]
     
     def __str__(self):
         return self.name
@@ -76,6 +79,9 @@ class Lesson(models.Model):
     class Meta:
         db_table = 'lessons'
         ordering = ['order']
+        indexes = [
+            models.Index(fields=['chapter', 'order'], name='lessons_chapter_order_idx'),
+        ]
     
     def __str__(self):
         return f"{self.chapter.name} - {self.title}"
@@ -1,9 +1,23 @@
 """
 Serializers for courses app
 """
+import re
+from collections import defaultdict
+
 from rest_framework import serializers
 from .models import Module, Chapter, Lesson, AcademicStream, ModuleEnrollment
 
+# Matches a file UUID embedded in a legacy video/pdf URL
+_UUID_RE = re.compile(r'[0-9a-f]{8}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{12}', re.IGNORECASE)
+
+
+def _extract_uuid(url):
+    """Return the first UUID found in url, or None"""
+    if not url:
+        return None
+    match = _UUID_RE.search(url)
+    return match.group(0) if match else None
+
 
 class AcademicStreamSerializer(serializers.ModelSerializer):
     """Serializer for AcademicStream model"""
@@ -13,9 +27,14 @@ class AcademicStreamSerializer(serializers.ModelSerializer):
         fields = ['id', 'name', 'name_ar']
 
 
+def _serialize_streams(streams):
+    """Same payload as AcademicStreamSerializer(many=True), without the per-row field machinery"""
+    return [{'id': str(stream.id), 'name': stream.name, 'name_ar': stream.name_ar} for stream in streams]
+
+
 class ModuleSerializer(serializers.ModelSerializer):
     """Serializer for Module model"""
-    academic_streams = AcademicStreamSerializer(many=True, read_only=True)
+    academic_streams = serializers.SerializerMethodField()
     
     class Meta:
         model = Module
@@ -24,11 +43,15 @@ class ModuleSerializer(serializers.ModelSerializer):
             'color', 'academic_streams', 'created_at', 'updated_at'
         ]
         read_only_fields = ['id', 'created_at', 'updated_at']
+    
+    def get_academic_streams(self, obj):
+        """Return academic streams; pair with prefetch_related('academic_streams')"""
+        return _serialize_streams(obj.academic_streams.all())
 
 
 class ChapterSerializer(serializers.ModelSerializer):
     """Serializer for Chapter model"""
-    academic_streams = AcademicStreamSerializer(many=True, read_only=True)
+    academic_streams = serializers.SerializerMethodField()
     
     class Meta:
         model = Chapter
@@ -36,13 +59,17 @@ class ChapterSerializer(serializers.ModelSerializer):
             'id', 'name', 'description', 'price', 'module', 'academic_streams'
         ]
         read_only_fields = ['id']
+    
+    def get_academic_streams(self, obj):
+        """Return academic streams; pair with prefetch_related('academic_streams')"""
+        return _serialize_streams(obj.academic_streams.all())
 
 
 class LessonSerializer(serializers.ModelSerializer):
     """Serializer for Lesson model"""
     academic_streams = serializers.SerializerMethodField()
     stream_ids = serializers.SerializerMethodField()
-    chapter_id = serializers.SerializerMethodField()
+    chapter_id = serializers.UUIDField(read_only=True)
     video_file_id = serializers.SerializerMethodField()
     pdf_file_id = serializers.SerializerMethodField()
     
@@ -56,6 +83,17 @@ class LessonSerializer(serializers.ModelSerializer):
         ]
         read_only_fields = ['id', 'created_at', 'updated_at']
     
+    def _prefetched_streams(self, obj):
+        """
+        Return the lesson's academic streams, loaded once per lesson and shared by
+        get_academic_streams and get_stream_ids. Views listing lessons should use
+        prefetch_related('academic_streams') so the whole list costs one query.
+        """
+        stream_cache = self.context.setdefault('_stream_cache', {})
+        if obj.id not in stream_cache:
+            stream_cache[obj.id] = list(obj.academic_streams.all())
+        return stream_cache[obj.id]
+    
     def get_academic_streams(self, obj):
         """Return academic streams as objects with id and name"""
         return [
@@ -64,44 +102,136 @@ class LessonSerializer(serializers.ModelSerializer):
                 'name': stream.name,
                 'labelKey': stream.name  # For frontend compatibility
             }
-            for stream in obj.academic_streams.all()
+            for stream in self._prefetched_streams(obj)
         ]
     
     def get_stream_ids(self, obj):
         """Return academic stream IDs as array"""
-        return [str(stream.id) for stream in obj.academic_streams.all()]
-    
-    def get_chapter_id(self, obj):
-        """Return chapter ID as string"""
-        return str(obj.chapter.id) if obj.chapter else None
+        return [str(stream.id) for stream in self._prefetched_streams(obj)]
     
     def get_video_file_id(self, obj):
         """Return video file ID (UUID) for secure access"""
-        if obj.video_file:
-            return str(obj.video_file.id)
-        # Try to extract UUID from URL if it's a full file URL
-        if obj.video_url:
-            # Check if URL contains a UUID pattern
-            import re
-            uuid_pattern = r'[0-9a-f]{8}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{12}'
-            match = re.search(uuid_pattern, obj.video_url, re.IGNORECASE)
-            if match:
-                return match.group(0)
-        return None
+        if obj.video_file_id:
+            return str(obj.video_file_id)
+        # Fall back to a UUID embedded in the legacy URL
+        return _extract_uuid(obj.video_url)
     
     def get_pdf_file_id(self, obj):
         """Return PDF file ID (UUID) for secure access"""
-        if obj.pdf_file:
-            return str(obj.pdf_file.id)
-        # Try to extract UUID from URL if it's a full file URL
-        if obj.pdf_url:
-            # Check if URL contains a UUID pattern
-            import re
-            uuid_pattern = r'[0-9a-f]{8}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{12}'
-            match = re.search(uuid_pattern, obj.pdf_url, re.IGNORECASE)
-            if match:
-                return match.group(0)
-        return None
+        if obj.pdf_file_id:
+            return str(obj.pdf_file_id)
+        # Fall back to a UUID embedded in the legacy URL
+        return _extract_uuid(obj.pdf_url)
+
+
+# List payloads built from .values() rows. They produce the same JSON as the
+# serializers above without instantiating a model and a serializer per row;
+# the serializers remain the source of truth for detail and write endpoints.
+
+def _stream_rows_by_owner(through, owner_column, owner_ids):
+    """Map owner id -> [{'id', 'name', 'name_ar'}] from one query on an M2M through table"""
+    streams = defaultdict(list)
+    rows = through.objects.filter(**{f'{owner_column}__in': owner_ids}).values_list(
+        owner_column, 'academicstream_id', 'academicstream__name', 'academicstream__name_ar'
+    )
+    for owner_id, stream_id, name, name_ar in rows:
+        streams[owner_id].append({'id': str(stream_id), 'name': name, 'name_ar': name_ar})
+    return streams
+
+
+def module_list_data(modules):
+    """ModuleSerializer(modules, many=True).data for a Module queryset"""
+    rows = list(modules.values(
+        'id', 'custom_id', 'name', 'description', 'image_path', 'color', 'created_at', 'updated_at'
+    ))
+    streams = _stream_rows_by_owner(Module.academic_streams.through, 'module_id', [r['id'] for r in rows])
+    return [
+        {
+            'id': str(r['id']),
+            'custom_id': r['custom_id'],
+            'name': r['name'],
+            'description': r['description'],
+            'image_path': r['image_path'],
+            'color': r['color'],
+            'academic_streams': streams.get(r['id'], []),
+            'created_at': r['created_at'],
+            'updated_at': r['updated_at'],
+        }
+        for r in rows
+    ]
+
+
+def chapter_list_data(chapters):
+    """ChapterSerializer(chapters, many=True).data for a Chapter queryset"""
+    rows = list(chapters.values('id', 'name', 'description', 'price', 'module_id'))
+    streams = _stream_rows_by_owner(Chapter.academic_streams.through, 'chapter_id', [r['id'] for r in rows])
+    return [
+        {
+            'id': str(r['id']),
+            'name': r['name'],
+            'description': r['description'],
+            'price': str(r['price']),
+            'module': str(r['module_id']),
+            'academic_streams': streams.get(r['id'], []),
+        }
+        for r in rows
+    ]
+
+
+def lesson_list_data(lessons):
+    """LessonSerializer(lessons, many=True).data for a Lesson queryset"""
+    rows = list(lessons.values(
+        'id', 'title', 'description', 'image', 'duration', 'order', 'video_url', 'pdf_url',
+        'video_file_id', 'pdf_file_id', 'exercise_total_mark', 'exercise_total_xp',
+        'chapter_id', 'created_at', 'updated_at'
+    ))
+    streams = _stream_rows_by_owner(Lesson.academic_streams.through, 'lesson_id', [r['id'] for r in rows])
+    data = []
+    for r in rows:
+        lesson_streams = streams.get(r['id'], [])
+        data.append({
+            'id': str(r['id']),
+            'title': r['title'],
+            'description': r['description'],
+            'image': r['image'],
+            'duration': r['duration'],
+            'order': r['order'],
+            'video_url': r['video_url'],
+            'pdf_url': r['pdf_url'],
+            'video_file_id': str(r['video_file_id']) if r['video_file_id'] else _extract_uuid(r['video_url']),
+            'pdf_file_id': str(r['pdf_file_id']) if r['pdf_file_id'] else _extract_uuid(r['pdf_url']),
+            'exercise_total_mark': r['exercise_total_mark'],
+            'exercise_total_xp': r['exercise_total_xp'],
+            'academic_streams': [
+                {'id': stream['id'], 'name': stream['name'], 'labelKey': stream['name']}
+                for stream in lesson_streams
+            ],
+            'stream_ids': [stream['id'] for stream in lesson_streams],
+            'chapter': str(r['chapter_id']),
+            'chapter_id': str(r['chapter_id']),
+            'created_at': r['created_at'],
+            'updated_at': r['updated_at'],
+        })
+    return data
+
+
+def enrollment_list_data(enrollments):
+    """ModuleEnrollmentSerializer(enrollments, many=True).data for a ModuleEnrollment queryset"""
+    rows = list(enrollments.values('id', 'module_id', 'student__first_name', 'enrolled_at', 'is_active'))
+    modules = {
+        module['id']: module
+        for module in module_list_data(Module.objects.filter(id__in=[r['module_id'] for r in rows]))
+    }
+    return [
+        {
+            'id': str(r['id']),
+            'module': modules[str(r['module_id'])],
+            'student_name': r['student__first_name'],
+            'enrolled_at': r['enrolled_at'],
+            'is_active': r['is_active'],
+        }
+        for r in rows
+    ]
 
 
 class ModuleEnrollmentSerializer(serializers.ModelSerializer):
@@ -128,11 +258,13 @@ class ModuleEnrollmentCreateSerializer(serializers.ModelSerializer):
         student = self.context['request'].user.student
         module = validated_data['module']
         
-        # Check if already enrolled
-        if ModuleEnrollment.objects.filter(student=student, module=module).exists():
-            raise serializers.ValidationError("Student is already enrolled in this module")
-        
-        return ModuleEnrollment.objects.create(
+        # get_or_create runs the INSERT in a savepoint and falls back to a lookup on
+        # the unique (student, module) conflict, so concurrent requests cannot race
+        enrollment, created = ModuleEnrollment.objects.get_or_create(
             student=student,
             module=module
         )
+        if not created:
+            raise serializers.ValidationError("Student is already enrolled in this module")
+        
+        return enrollment
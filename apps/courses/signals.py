@@ -0,0 +1,22 @@
+"""
+Signal handlers for courses app
+"""
+from django.db.models.signals import m2m_changed, post_delete, post_save
+from django.dispatch import receiver
+
+from .cache import invalidate_reference_data
+from .models import AcademicStream, Module
+
+
+@receiver(post_save, sender=Module)
+@receiver(post_delete, sender=Module)
+@receiver(post_save, sender=AcademicStream)
+@receiver(post_delete, sender=AcademicStream)
+def invalidate_on_reference_change(sender, **kwargs):
+    invalidate_reference_data()
+
+
+@receiver(m2m_changed, sender=Module.academic_streams.through)
+def invalidate_on_module_streams_change(sender, action, **kwargs):
+    if action in ('post_add', 'post_remove', 'post_clear'):
+        invalidate_reference_data()
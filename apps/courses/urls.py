@@ -29,5 +29,6 @@ urlpatterns = [
     path('module/<uuid:module_id>/enroll', views.enroll_in_module, name='enroll_in_module'),
     path('module/<uuid:module_id>/unenroll', views.unenroll_from_module, name='unenroll_from_module'),
     path('enrollments', views.get_enrolled_modules, name='get_enrolled_modules'),
+    path('enrollments/ids', views.get_enrolled_module_ids, name='get_enrolled_module_ids'),
     path('module/<uuid:module_id>/enrollment-status', views.check_enrollment_status, name='check_enrollment_status'),
 ]
@@ -1,41 +1,49 @@
 """
 Views for courses app
 """
-import uuid
+import logging
+
 from rest_framework import status
 from rest_framework.decorators import api_view, permission_classes
 from rest_framework.permissions import AllowAny, IsAuthenticated
 from rest_framework.response import Response
-from django.utils import timezone
+from django.db import transaction
+from django.db.models import F, FilteredRelation, Q
 from .models import Module, Chapter, Lesson, AcademicStream, ModuleEnrollment
-from .serializers import ModuleSerializer, ChapterSerializer, LessonSerializer, AcademicStreamSerializer, ModuleEnrollmentSerializer, ModuleEnrollmentCreateSerializer
+from .serializers import (
+    ModuleSerializer, ChapterSerializer, LessonSerializer, AcademicStreamSerializer, ModuleEnrollmentSerializer, ModuleEnrollmentCreateSerializer,
+    module_list_data, chapter_list_data, lesson_list_data, enrollment_list_data
+)
+from .cache import ACADEMIC_STREAMS_CACHE_KEY, MODULES_CACHE_KEY, cached_payload
 from core.permissions import IsStudentUser
+from core.responses import envelope
+
+logger = logging.getLogger(__name__)
+
+# Lesson fields clients may set through create_lesson/update_lesson, with create defaults
+_LESSON_DEFAULTS = {
+    'title': '',
+    'description': '',
+    'image': None,
+    'duration': 30,
+    'order': 1,
+    'video_url': None,
+    'pdf_url': None,
+    'exercise_total_mark': 0,
+    'exercise_total_xp': 0,
+}
+_LESSON_FIELDS = tuple(_LESSON_DEFAULTS)
 
 
 @api_view(['GET'])
 @permission_classes([AllowAny])
 def get_modules(request):
     """Get all modules"""
-    try:
-        modules = Module.objects.all().order_by('name')
-        serializer = ModuleSerializer(modules, many=True)
-        
-        return Response({
-            'success': True,
-            'data': serializer.data,
-            'message': 'Modules retrieved successfully',
-            'request_id': str(uuid.uuid4()),
-            'timestamp': timezone.now().isoformat()
-        }, status=status.HTTP_200_OK)
-        
-    except Exception as e:
-        return Response({
-            'success': False,
-            'data': None,
-            'message': f'Error retrieving modules: {str(e)}',
-            'request_id': str(uuid.uuid4()),
-            'timestamp': timezone.now().isoformat()
-        }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+    etag, data = cached_payload(MODULES_CACHE_KEY, lambda: module_list_data(Module.objects.order_by('name')))
+    if request.headers.get('If-None-Match') == etag:
+        return Response(status=status.HTTP_304_NOT_MODIFIED, headers={'ETag': etag})
+    
+    return Response(envelope(True, data, 'Modules retrieved successfully'), status=status.HTTP_200_OK, headers={'ETag': etag})
 
 
 @api_view(['GET'])
@@ -43,60 +51,22 @@ def get_modules(request):
 def get_module_by_id(request, module_id):
     """Get a specific module by ID"""
     try:
-        module = Module.objects.get(id=module_id)
-        serializer = ModuleSerializer(module)
-        
-        return Response({
-            'success': True,
-            'data': serializer.data,
-            'message': 'Module retrieved successfully',
-            'request_id': str(uuid.uuid4()),
-            'timestamp': timezone.now().isoformat()
-        }, status=status.HTTP_200_OK)
-        
+        module = Module.objects.prefetch_related('academic_streams').get(id=module_id)
     except Module.DoesNotExist:
-        return Response({
-            'success': False,
-            'data': None,
-            'message': 'Module not found',
-            'request_id': str(uuid.uuid4()),
-            'timestamp': timezone.now().isoformat()
-        }, status=status.HTTP_404_NOT_FOUND)
-        
-    except Exception as e:
-        return Response({
-            'success': False,
-            'data': None,
-            'message': f'Error retrieving module: {str(e)}',
-            'request_id': str(uuid.uuid4()),
-            'timestamp': timezone.now().isoformat()
-        }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+        return Response(envelope(False, None, 'Module not found'), status=status.HTTP_404_NOT_FOUND)
+    
+    serializer = ModuleSerializer(module)
+    
+    return Response(envelope(True, serializer.data, 'Module retrieved successfully'), status=status.HTTP_200_OK)
 
 
 @api_view(['GET'])
 @permission_classes([AllowAny])
 def get_chapters_by_module(request, module_id):
     """Get all chapters for a specific module"""
-    try:
-        chapters = Chapter.objects.filter(module_id=module_id).prefetch_related('academic_streams').order_by('name')
-        serializer = ChapterSerializer(chapters, many=True)
-        
-        return Response({
-            'success': True,
-            'data': serializer.data,
-            'message': 'Chapters retrieved successfully',
-            'request_id': str(uuid.uuid4()),
-            'timestamp': timezone.now().isoformat()
-        }, status=status.HTTP_200_OK)
-        
-    except Exception as e:
-        return Response({
-            'success': False,
-            'data': None,
-            'message': f'Error retrieving chapters: {str(e)}',
-            'request_id': str(uuid.uuid4()),
-            'timestamp': timezone.now().isoformat()
-        }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+    chapters = Chapter.objects.filter(module_id=module_id).order_by('name')
+    
+    return Response(envelope(True, chapter_list_data(chapters), 'Chapters retrieved successfully'), status=status.HTTP_200_OK)
 
 
 @api_view(['GET'])
@@ -105,33 +75,12 @@ def get_chapter_by_id(request, chapter_id):
     """Get a specific chapter by ID"""
     try:
         chapter = Chapter.objects.prefetch_related('academic_streams').get(id=chapter_id)
-        serializer = ChapterSerializer(chapter)
-        
-        return Response({
-            'success': True,
-            'data': serializer.data,
-            'message': 'Chapter retrieved successfully',
-            'request_id': str(uuid.uuid4()),
-            'timestamp': timezone.now().isoformat()
-        }, status=status.HTTP_200_OK)
-        
     except Chapter.DoesNotExist:
-        return Response({
-            'success': False,
-            'data': None,
-            'message': 'Chapter not found',
-            'request_id': str(uuid.uuid4()),
-            'timestamp': timezone.now().isoformat()
-        }, status=status.HTTP_404_NOT_FOUND)
-        
-    except Exception as e:
-        return Response({
-            'success': False,
-            'data': None,
-            'message': f'Error retrieving chapter: {str(e)}',
-            'request_id': str(uuid.uuid4()),
-            'timestamp': timezone.now().isoformat()
-        }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+        return Response(envelope(False, None, 'Chapter not found'), status=status.HTTP_404_NOT_FOUND)
+    
+    serializer = ChapterSerializer(chapter)
+    
+    return Response(envelope(True, serializer.data, 'Chapter retrieved successfully'), status=status.HTTP_200_OK)
 
 
 @api_view(['PUT'])
@@ -139,67 +88,39 @@ def get_chapter_by_id(request, chapter_id):
 def update_chapter(request, chapter_id):
     """Update a specific chapter by ID with comprehensive data"""
     try:
-        # Debug: Print received data
-        print(f"Received data for chapter {chapter_id}: {request.data}")
-        
-        chapter = Chapter.objects.get(id=chapter_id)
-        
-        # Update basic chapter fields
-        if 'name' in request.data:
-            chapter.name = request.data['name']
-        if 'description' in request.data:
-            chapter.description = request.data['description']
-        if 'price' in request.data:
-            chapter.price = request.data['price']
-        
-        # Update academic streams if provided
-        if 'academic_streams' in request.data:
-            stream_ids = request.data['academic_streams']
-            print(f"Processing academic streams: {stream_ids}")
-            # Clear existing streams and add new ones
-            chapter.academic_streams.clear()
-            for stream_id in stream_ids:
-                try:
-                    stream = AcademicStream.objects.get(id=stream_id)
-                    chapter.academic_streams.add(stream)
-                    print(f"Added stream {stream_id} to chapter")
-                except AcademicStream.DoesNotExist:
-                    print(f"Stream {stream_id} not found, skipping")
-                    # Skip invalid stream IDs
-                    continue
-        else:
-            print("No academic_streams in request data")
-        
-        # Save all changes to database
-        chapter.save()
+        # Update only the basic chapter fields present in the request
+        fields = {key: request.data[key] for key in ('name', 'description', 'price') if key in request.data}
+        
+        with transaction.atomic():
+            chapters = Chapter.objects.filter(id=chapter_id)
+            found = chapters.update(**fields) if fields else chapters.exists()
+            if not found:
+                raise Chapter.DoesNotExist
+            
+            # Update academic streams if provided
+            if 'academic_streams' in request.data:
+                stream_ids = request.data['academic_streams']
+                # Replace existing streams; invalid stream IDs are skipped
+                requested_ids = {str(stream_id).lower() for stream_id in stream_ids}
+                valid_ids = {
+                    str(stream_id)
+                    for stream_id in AcademicStream.objects.filter(id__in=requested_ids).values_list('id', flat=True)
+                }
+                invalid_ids = requested_ids - valid_ids
+                if invalid_ids:
+                    logger.warning(f"Skipping unknown academic streams for chapter {chapter_id}: {sorted(invalid_ids)}")
+                Chapter(id=chapter_id).academic_streams.set(valid_ids)
         
+        chapter = Chapter.objects.prefetch_related('academic_streams').get(id=chapter_id)
         serializer = ChapterSerializer(chapter)
         
-        return Response({
-            'success': True,
-            'data': serializer.data,
-            'message': 'Chapter updated successfully',
-            'request_id': str(uuid.uuid4()),
-            'timestamp': timezone.now().isoformat()
-        }, status=status.HTTP_200_OK)
+        return Response(envelope(True, serializer.data, 'Chapter updated successfully'), status=status.HTTP_200_OK)
         
     except Chapter.DoesNotExist:
-        return Response({
-            'success': False,
-            'data': None,
-            'message': 'Chapter not found',
-            'request_id': str(uuid.uuid4()),
-            'timestamp': timezone.now().isoformat()
-        }, status=status.HTTP_404_NOT_FOUND)
+        return Response(envelope(False, None, 'Chapter not found'), status=status.HTTP_404_NOT_FOUND)
         
     except Exception as e:
-        return Response({
-            'success': False,
-            'data': None,
-            'message': f'Error updating chapter: {str(e)}',
-            'request_id': str(uuid.uuid4()),
-            'timestamp': timezone.now().isoformat()
-        }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+        return Response(envelope(False, None, f'Error updating chapter: {str(e)}'), status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
 
 @api_view(['POST'])
@@ -213,66 +134,25 @@ def add_stream_to_chapter(request, chapter_id, stream_id):
         # Add the stream to the chapter
         chapter.academic_streams.add(stream)
         
-        return Response({
-            'success': True,
-            'data': {'success': True},
-            'message': 'Academic stream added to chapter successfully',
-            'request_id': str(uuid.uuid4()),
-            'timestamp': timezone.now().isoformat()
-        }, status=status.HTTP_200_OK)
+        return Response(envelope(True, {'success': True}, 'Academic stream added to chapter successfully'), status=status.HTTP_200_OK)
         
     except Chapter.DoesNotExist:
-        return Response({
-            'success': False,
-            'data': None,
-            'message': 'Chapter not found',
-            'request_id': str(uuid.uuid4()),
-            'timestamp': timezone.now().isoformat()
-        }, status=status.HTTP_404_NOT_FOUND)
+        return Response(envelope(False, None, 'Chapter not found'), status=status.HTTP_404_NOT_FOUND)
         
     except AcademicStream.DoesNotExist:
-        return Response({
-            'success': False,
-            'data': None,
-            'message': 'Academic stream not found',
-            'request_id': str(uuid.uuid4()),
-            'timestamp': timezone.now().isoformat()
-        }, status=status.HTTP_404_NOT_FOUND)
+        return Response(envelope(False, None, 'Academic stream not found'), status=status.HTTP_404_NOT_FOUND)
         
     except Exception as e:
-        return Response({
-            'success': False,
-            'data': None,
-            'message': f'Error adding stream to chapter: {str(e)}',
-            'request_id': str(uuid.uuid4()),
-            'timestamp': timezone.now().isoformat()
-        }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+        return Response(envelope(False, None, f'Error adding stream to chapter: {str(e)}'), status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
 
 @api_view(['GET'])
 @permission_classes([AllowAny])
 def get_lessons_by_chapter(request, chapter_id):
     """Get all lessons for a specific chapter"""
-    try:
-        lessons = Lesson.objects.filter(chapter_id=chapter_id).order_by('order')
-        serializer = LessonSerializer(lessons, many=True)
-        
-        return Response({
-            'success': True,
-            'data': serializer.data,
-            'message': 'Lessons retrieved successfully',
-            'request_id': str(uuid.uuid4()),
-            'timestamp': timezone.now().isoformat()
-        }, status=status.HTTP_200_OK)
-        
-    except Exception as e:
-        return Response({
-            'success': False,
-            'data': None,
-            'message': f'Error retrieving lessons: {str(e)}',
-            'request_id': str(uuid.uuid4()),
-            'timestamp': timezone.now().isoformat()
-        }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+    lessons = Lesson.objects.filter(chapter_id=chapter_id).order_by('order')
+    
+    return Response(envelope(True, lesson_list_data(lessons), 'Lessons retrieved successfully'), status=status.HTTP_200_OK)
 
 
 @api_view(['POST'])
@@ -280,99 +160,51 @@ def get_lessons_by_chapter(request, chapter_id):
 def create_lesson(request):
     """Create a new lesson"""
     try:
-        # Get the chapter
+        # Validate required fields before touching the database
+        if not request.data.get('title', ''):
+            return Response(envelope(False, None, 'Lesson title is required'), status=status.HTTP_400_BAD_REQUEST)
+        
+        if not request.data.get('description', ''):
+            return Response(envelope(False, None, 'Lesson description is required'), status=status.HTTP_400_BAD_REQUEST)
+        
         chapter_id = request.data.get('chapter_id')
         if not chapter_id:
-            return Response({
-                'success': False,
-                'data': None,
-                'message': 'Chapter ID is required',
-                'request_id': str(uuid.uuid4()),
-                'timestamp': timezone.now().isoformat()
-            }, status=status.HTTP_400_BAD_REQUEST)
+            return Response(envelope(False, None, 'Chapter ID is required'), status=status.HTTP_400_BAD_REQUEST)
         
-        try:
-            chapter = Chapter.objects.get(id=chapter_id)
-        except Chapter.DoesNotExist:
-            return Response({
-                'success': False,
-                'data': None,
-                'message': 'Chapter not found',
-                'request_id': str(uuid.uuid4()),
-                'timestamp': timezone.now().isoformat()
-            }, status=status.HTTP_404_NOT_FOUND)
+        # Only the id is needed, so check existence instead of loading the chapter
+        if not Chapter.objects.filter(id=chapter_id).exists():
+            return Response(envelope(False, None, 'Chapter not found'), status=status.HTTP_404_NOT_FOUND)
         
         # Prepare lesson data
         lesson_data = {
-            'title': request.data.get('title', ''),
-            'description': request.data.get('description', ''),
-            'image': request.data.get('image'),
-            'duration': request.data.get('duration', 30),
-            'order': request.data.get('order', 1),
-            'video_url': request.data.get('video_url'),
-            'pdf_url': request.data.get('pdf_url'),
-            'exercise_total_mark': request.data.get('exercise_total_mark', 0),
-            'exercise_total_xp': request.data.get('exercise_total_xp', 0),
-            'chapter': chapter.id
+            **_LESSON_DEFAULTS,
+            **{key: request.data[key] for key in _LESSON_FIELDS if key in request.data},
+            'chapter': chapter_id
         }
         
-        # Validate required fields
-        if not lesson_data['title']:
-            return Response({
-                'success': False,
-                'data': None,
-                'message': 'Lesson title is required',
-                'request_id': str(uuid.uuid4()),
-                'timestamp': timezone.now().isoformat()
-            }, status=status.HTTP_400_BAD_REQUEST)
-        
-        if not lesson_data['description']:
-            return Response({
-                'success': False,
-                'data': None,
-                'message': 'Lesson description is required',
-                'request_id': str(uuid.uuid4()),
-                'timestamp': timezone.now().isoformat()
-            }, status=status.HTTP_400_BAD_REQUEST)
-        
         # Create the lesson
         serializer = LessonSerializer(data=lesson_data)
         if serializer.is_valid():
-            lesson = serializer.save()
-            
-            # Handle academic streams if provided
-            academic_streams = request.data.get('academic_streams', [])
-            if academic_streams:
-                try:
-                    stream_objects = AcademicStream.objects.filter(id__in=academic_streams)
-                    lesson.academic_streams.set(stream_objects)
-                except Exception as e:
-                    print(f"Warning: Could not process academic streams: {e}")
+            with transaction.atomic():
+                lesson = serializer.save()
+                
+                # Handle academic streams if provided
+                academic_streams = request.data.get('academic_streams', [])
+                if academic_streams:
+                    try:
+                        # Savepoint so a failed stream update leaves the lesson insert usable
+                        with transaction.atomic():
+                            stream_objects = AcademicStream.objects.filter(id__in=academic_streams)
+                            lesson.academic_streams.set(stream_objects)
+                    except Exception as e:
+                        logger.warning(f"Could not process academic streams: {e}")
             
-            return Response({
-                'success': True,
-                'data': serializer.data,
-                'message': 'Lesson created successfully',
-                'request_id': str(uuid.uuid4()),
-                'timestamp': timezone.now().isoformat()
-            }, status=status.HTTP_201_CREATED)
+            return Response(envelope(True, serializer.data, 'Lesson created successfully'), status=status.HTTP_201_CREATED)
         else:
-            return Response({
-                'success': False,
-                'data': None,
-                'message': f'Validation error: {serializer.errors}',
-                'request_id': str(uuid.uuid4()),
-                'timestamp': timezone.now().isoformat()
-            }, status=status.HTTP_400_BAD_REQUEST)
+            return Response(envelope(False, None, f'Validation error: {serializer.errors}'), status=status.HTTP_400_BAD_REQUEST)
         
     except Exception as e:
-        return Response({
-            'success': False,
-            'data': None,
-            'message': f'Error creating lesson: {str(e)}',
-            'request_id': str(uuid.uuid4()),
-            'timestamp': timezone.now().isoformat()
-        }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+        return Response(envelope(False, None, f'Error creating lesson: {str(e)}'), status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
 
 @api_view(['GET'])
@@ -380,34 +212,34 @@ def create_lesson(request):
 def get_lesson_by_id(request, lesson_id):
     """Get a specific lesson by ID with optional progress data"""
     try:
-        lesson = Lesson.objects.get(id=lesson_id)
+        lessons = Lesson.objects.prefetch_related('academic_streams')
+        is_student = request.user.is_authenticated and hasattr(request.user, 'student')
+        if is_student:
+            # LEFT JOIN the student's progress row (unique per student/lesson) into the lesson query
+            lessons = lessons.annotate(
+                own_progress=FilteredRelation(
+                    'student_progress', condition=Q(student_progress__student=request.user.student)
+                ),
+                progress_id=F('own_progress__id'),
+                progress_is_completed=F('own_progress__is_completed'),
+                progress_is_unlocked=F('own_progress__is_unlocked'),
+                progress_time_spent=F('own_progress__time_spent'),
+                progress_completed_at=F('own_progress__completed_at'),
+            )
+        lesson = lessons.get(id=lesson_id)
         serializer = LessonSerializer(lesson)
         lesson_data = serializer.data
         
         # Add progress data if user is authenticated as a student
-        if request.user.is_authenticated and hasattr(request.user, 'student'):
-            from apps.progress.models import LessonProgress
-            try:
-                progress = LessonProgress.objects.get(
-                    student=request.user.student,
-                    lesson=lesson
-                )
-                lesson_data['progress'] = {
-                    'is_completed': progress.is_completed,
-                    'is_unlocked': progress.is_unlocked,
-                    'time_spent': progress.time_spent,
-                    'completed_at': progress.completed_at.isoformat() if progress.completed_at else None,
-                }
-            except LessonProgress.DoesNotExist:
-                # Default progress for new lesson
-                lesson_data['progress'] = {
-                    'is_completed': False,
-                    'is_unlocked': True,
-                    'time_spent': 0,
-                    'completed_at': None,
-                }
+        if is_student and lesson.progress_id is not None:
+            lesson_data['progress'] = {
+                'is_completed': lesson.progress_is_completed,
+                'is_unlocked': lesson.progress_is_unlocked,
+                'time_spent': lesson.progress_time_spent,
+                'completed_at': lesson.progress_completed_at.isoformat() if lesson.progress_completed_at else None,
+            }
         else:
-            # Default progress for unauthenticated users
+            # Default progress for new lessons and unauthenticated users
             lesson_data['progress'] = {
                 'is_completed': False,
                 'is_unlocked': True,
@@ -415,31 +247,13 @@ def get_lesson_by_id(request, lesson_id):
                 'completed_at': None,
             }
         
-        return Response({
-            'success': True,
-            'data': lesson_data,
-            'message': 'Lesson retrieved successfully',
-            'request_id': str(uuid.uuid4()),
-            'timestamp': timezone.now().isoformat()
-        }, status=status.HTTP_200_OK)
+        return Response(envelope(True, lesson_data, 'Lesson retrieved successfully'), status=status.HTTP_200_OK)
         
     except Lesson.DoesNotExist:
-        return Response({
-            'success': False,
-            'data': None,
-            'message': 'Lesson not found',
-            'request_id': str(uuid.uuid4()),
-            'timestamp': timezone.now().isoformat()
-        }, status=status.HTTP_404_NOT_FOUND)
+        return Response(envelope(False, None, 'Lesson not found'), status=status.HTTP_404_NOT_FOUND)
         
     except Exception as e:
-        return Response({
-            'success': False,
-            'data': None,
-            'message': f'Error retrieving lesson: {str(e)}',
-            'request_id': str(uuid.uuid4()),
-            'timestamp': timezone.now().isoformat()
-        }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+        return Response(envelope(False, None, f'Error retrieving lesson: {str(e)}'), status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
 
 @api_view(['PUT'])
@@ -447,96 +261,44 @@ def get_lesson_by_id(request, lesson_id):
 def update_lesson(request, lesson_id):
     """Update an existing lesson"""
     try:
-        try:
-            lesson = Lesson.objects.get(id=lesson_id)
-        except Lesson.DoesNotExist:
-            return Response({
-                'success': False,
-                'data': None,
-                'message': 'Lesson not found',
-                'request_id': str(uuid.uuid4()),
-                'timestamp': timezone.now().isoformat()
-            }, status=status.HTTP_404_NOT_FOUND)
-        
         # Prepare update data
-        update_data = {}
-        
-        if 'title' in request.data:
-            update_data['title'] = request.data['title']
-        if 'description' in request.data:
-            update_data['description'] = request.data['description']
-        if 'image' in request.data:
-            update_data['image'] = request.data['image']
-        if 'duration' in request.data:
-            update_data['duration'] = request.data['duration']
-        if 'order' in request.data:
-            update_data['order'] = request.data['order']
-        if 'video_url' in request.data:
-            update_data['video_url'] = request.data['video_url']
-        if 'pdf_url' in request.data:
-            update_data['pdf_url'] = request.data['pdf_url']
-        if 'exercise_total_mark' in request.data:
-            update_data['exercise_total_mark'] = request.data['exercise_total_mark']
-        if 'exercise_total_xp' in request.data:
-            update_data['exercise_total_xp'] = request.data['exercise_total_xp']
+        update_data = {key: request.data[key] for key in _LESSON_FIELDS if key in request.data}
         
         # Validate required fields if provided
         if 'title' in update_data and not update_data['title']:
-            return Response({
-                'success': False,
-                'data': None,
-                'message': 'Lesson title cannot be empty',
-                'request_id': str(uuid.uuid4()),
-                'timestamp': timezone.now().isoformat()
-            }, status=status.HTTP_400_BAD_REQUEST)
+            return Response(envelope(False, None, 'Lesson title cannot be empty'), status=status.HTTP_400_BAD_REQUEST)
         
         if 'description' in update_data and not update_data['description']:
-            return Response({
-                'success': False,
-                'data': None,
-                'message': 'Lesson description cannot be empty',
-                'request_id': str(uuid.uuid4()),
-                'timestamp': timezone.now().isoformat()
-            }, status=status.HTTP_400_BAD_REQUEST)
+            return Response(envelope(False, None, 'Lesson description cannot be empty'), status=status.HTTP_400_BAD_REQUEST)
+        
+        try:
+            lesson = Lesson.objects.get(id=lesson_id)
+        except Lesson.DoesNotExist:
+            return Response(envelope(False, None, 'Lesson not found'), status=status.HTTP_404_NOT_FOUND)
         
         # Update the lesson
         serializer = LessonSerializer(lesson, data=update_data, partial=True)
         if serializer.is_valid():
-            updated_lesson = serializer.save()
+            with transaction.atomic():
+                updated_lesson = serializer.save()
+                
+                # Handle academic streams if provided
+                if 'academic_streams' in request.data:
+                    academic_streams = request.data.get('academic_streams', [])
+                    try:
+                        # Savepoint so a failed stream update leaves the lesson update usable
+                        with transaction.atomic():
+                            stream_objects = AcademicStream.objects.filter(id__in=academic_streams)
+                            updated_lesson.academic_streams.set(stream_objects)
+                    except Exception as e:
+                        logger.warning(f"Could not update academic streams: {e}")
             
-            # Handle academic streams if provided
-            if 'academic_streams' in request.data:
-                academic_streams = request.data.get('academic_streams', [])
-                try:
-                    stream_objects = AcademicStream.objects.filter(id__in=academic_streams)
-                    updated_lesson.academic_streams.set(stream_objects)
-                except Exception as e:
-                    print(f"Warning: Could not update academic streams: {e}")
-            
-            return Response({
-                'success': True,
-                'data': serializer.data,
-                'message': 'Lesson updated successfully',
-                'request_id': str(uuid.uuid4()),
-                'timestamp': timezone.now().isoformat()
-            }, status=status.HTTP_200_OK)
+            return Response(envelope(True, serializer.data, 'Lesson updated successfully'), status=status.HTTP_200_OK)
         else:
-            return Response({
-                'success': False,
-                'data': None,
-                'message': f'Validation error: {serializer.errors}',
-                'request_id': str(uuid.uuid4()),
-                'timestamp': timezone.now().isoformat()
-            }, status=status.HTTP_400_BAD_REQUEST)
+            return Response(envelope(False, None, f'Validation error: {serializer.errors}'), status=status.HTTP_400_BAD_REQUEST)
         
     except Exception as e:
-        return Response({
-            'success': False,
-            'data': None,
-            'message': f'Error updating lesson: {str(e)}',
-            'request_id': str(uuid.uuid4()),
-            'timestamp': timezone.now().isoformat()
-        }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+        return Response(envelope(False, None, f'Error updating lesson: {str(e)}'), status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
 
 @api_view(['DELETE'])
@@ -544,61 +306,29 @@ def update_lesson(request, lesson_id):
 def delete_lesson(request, lesson_id):
     """Delete a lesson"""
     try:
-        try:
-            lesson = Lesson.objects.get(id=lesson_id)
-        except Lesson.DoesNotExist:
-            return Response({
-                'success': False,
-                'data': None,
-                'message': 'Lesson not found',
-                'request_id': str(uuid.uuid4()),
-                'timestamp': timezone.now().isoformat()
-            }, status=status.HTTP_404_NOT_FOUND)
-        
-        lesson.delete()
-        
-        return Response({
-            'success': True,
-            'data': None,
-            'message': 'Lesson deleted successfully',
-            'request_id': str(uuid.uuid4()),
-            'timestamp': timezone.now().isoformat()
-        }, status=status.HTTP_200_OK)
+        # Delete without loading the lesson first; nothing deleted means it did not exist
+        deleted, _ = Lesson.objects.filter(id=lesson_id).delete()
+        if not deleted:
+            return Response(envelope(False, None, 'Lesson not found'), status=status.HTTP_404_NOT_FOUND)
+        
+        return Response(envelope(True, None, 'Lesson deleted successfully'), status=status.HTTP_200_OK)
         
     except Exception as e:
-        return Response({
-            'success': False,
-            'data': None,
-            'message': f'Error deleting lesson: {str(e)}',
-            'request_id': str(uuid.uuid4()),
-            'timestamp': timezone.now().isoformat()
-        }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+        return Response(envelope(False, None, f'Error deleting lesson: {str(e)}'), status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
 
 @api_view(['GET'])
 @permission_classes([AllowAny])
 def get_academic_streams(request):
     """Get all academic streams"""
-    try:
-        streams = AcademicStream.objects.all().order_by('name')
-        serializer = AcademicStreamSerializer(streams, many=True)
-        
-        return Response({
-            'success': True,
-            'data': serializer.data,
-            'message': 'Academic streams retrieved successfully',
-            'request_id': str(uuid.uuid4()),
-            'timestamp': timezone.now().isoformat()
-        }, status=status.HTTP_200_OK)
-        
-    except Exception as e:
-        return Response({
-            'success': False,
-            'data': None,
-            'message': f'Error retrieving academic streams: {str(e)}',
-            'request_id': str(uuid.uuid4()),
-            'timestamp': timezone.now().isoformat()
-        }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+    etag, data = cached_payload(
+        ACADEMIC_STREAMS_CACHE_KEY,
+        lambda: list(AcademicStreamSerializer(AcademicStream.objects.all().order_by('name'), many=True).data)
+    )
+    if request.headers.get('If-None-Match') == etag:
+        return Response(status=status.HTTP_304_NOT_MODIFIED, headers={'ETag': etag})
+    
+    return Response(envelope(True, data, 'Academic streams retrieved successfully'), status=status.HTTP_200_OK, headers={'ETag': etag})
 
 
 # Enrollment Views
@@ -611,13 +341,7 @@ def enroll_in_module(request, module_id):
         try:
             module = Module.objects.get(id=module_id)
         except Module.DoesNotExist:
-            return Response({
-                'success': False,
-                'data': None,
-                'message': 'Module not found',
-                'request_id': str(uuid.uuid4()),
-                'timestamp': timezone.now().isoformat()
-            }, status=status.HTTP_404_NOT_FOUND)
+            return Response(envelope(False, None, 'Module not found'), status=status.HTTP_404_NOT_FOUND)
         
         # Create enrollment
         serializer = ModuleEnrollmentCreateSerializer(
@@ -629,30 +353,12 @@ def enroll_in_module(request, module_id):
             enrollment = serializer.save()
             response_serializer = ModuleEnrollmentSerializer(enrollment)
             
-            return Response({
-                'success': True,
-                'data': response_serializer.data,
-                'message': 'Successfully enrolled in module',
-                'request_id': str(uuid.uuid4()),
-                'timestamp': timezone.now().isoformat()
-            }, status=status.HTTP_201_CREATED)
+            return Response(envelope(True, response_serializer.data, 'Successfully enrolled in module'), status=status.HTTP_201_CREATED)
         else:
-            return Response({
-                'success': False,
-                'data': None,
-                'message': f'Enrollment failed: {serializer.errors}',
-                'request_id': str(uuid.uuid4()),
-                'timestamp': timezone.now().isoformat()
-            }, status=status.HTTP_400_BAD_REQUEST)
+            return Response(envelope(False, None, f'Enrollment failed: {serializer.errors}'), status=status.HTTP_400_BAD_REQUEST)
             
     except Exception as e:
-        return Response({
-            'success': False,
-            'data': None,
-            'message': f'Error enrolling in module: {str(e)}',
-            'request_id': str(uuid.uuid4()),
-            'timestamp': timezone.now().isoformat()
-        }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+        return Response(envelope(False, None, f'Error enrolling in module: {str(e)}'), status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
 
 @api_view(['DELETE'])
@@ -662,103 +368,64 @@ def unenroll_from_module(request, module_id):
     try:
         student = request.user.student
         
-        try:
-            enrollment = ModuleEnrollment.objects.get(
-                student=student,
-                module_id=module_id,
-                is_active=True
-            )
-        except ModuleEnrollment.DoesNotExist:
-            return Response({
-                'success': False,
-                'data': None,
-                'message': 'Student is not enrolled in this module',
-                'request_id': str(uuid.uuid4()),
-                'timestamp': timezone.now().isoformat()
-            }, status=status.HTTP_404_NOT_FOUND)
-        
-        # Deactivate enrollment instead of deleting
-        enrollment.is_active = False
-        enrollment.save()
-        
-        return Response({
-            'success': True,
-            'data': None,
-            'message': 'Successfully unenrolled from module',
-            'request_id': str(uuid.uuid4()),
-            'timestamp': timezone.now().isoformat()
-        }, status=status.HTTP_200_OK)
+        # Deactivate enrollment instead of deleting, in a single UPDATE
+        updated = ModuleEnrollment.objects.filter(
+            student=student,
+            module_id=module_id,
+            is_active=True
+        ).update(is_active=False)
+        if not updated:
+            return Response(envelope(False, None, 'Student is not enrolled in this module'), status=status.HTTP_404_NOT_FOUND)
+        
+        return Response(envelope(True, None, 'Successfully unenrolled from module'), status=status.HTTP_200_OK)
         
     except Exception as e:
-        return Response({
-            'success': False,
-            'data': None,
-            'message': f'Error unenrolling from module: {str(e)}',
-            'request_id': str(uuid.uuid4()),
-            'timestamp': timezone.now().isoformat()
-        }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+        return Response(envelope(False, None, f'Error unenrolling from module: {str(e)}'), status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
 
 @api_view(['GET'])
 @permission_classes([IsAuthenticated, IsStudentUser])
 def get_enrolled_modules(request):
     """Get all modules the student is enrolled in"""
-    try:
-        student = request.user.student
-        enrollments = ModuleEnrollment.objects.filter(
-            student=student,
-            is_active=True
-        ).select_related('module').order_by('-enrolled_at')
-        
-        serializer = ModuleEnrollmentSerializer(enrollments, many=True)
-        
-        return Response({
-            'success': True,
-            'data': serializer.data,
-            'message': 'Enrolled modules retrieved successfully',
-            'request_id': str(uuid.uuid4()),
-            'timestamp': timezone.now().isoformat()
-        }, status=status.HTTP_200_OK)
-        
-    except Exception as e:
-        return Response({
-            'success': False,
-            'data': None,
-            'message': f'Error retrieving enrolled modules: {str(e)}',
-            'request_id': str(uuid.uuid4()),
-            'timestamp': timezone.now().isoformat()
-        }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+    student = request.user.student
+    enrollments = ModuleEnrollment.objects.filter(
+        student=student,
+        is_active=True
+    ).order_by('-enrolled_at')
+    
+    return Response(envelope(True, enrollment_list_data(enrollments), 'Enrolled modules retrieved successfully'), status=status.HTTP_200_OK)
+
+
+@api_view(['GET'])
+@permission_classes([IsAuthenticated, IsStudentUser])
+def get_enrolled_module_ids(request):
+    """Get the ids of all modules the student is enrolled in, for client-side membership checks"""
+    module_ids = ModuleEnrollment.objects.filter(
+        student=request.user.student,
+        is_active=True
+    ).values_list('module_id', flat=True)
+    
+    return Response(envelope(
+        True,
+        [str(module_id) for module_id in module_ids],
+        'Enrolled module ids retrieved successfully'
+    ), status=status.HTTP_200_OK)
 
 
 @api_view(['GET'])
 @permission_classes([IsAuthenticated, IsStudentUser])
 def check_enrollment_status(request, module_id):
     """Check if student is enrolled in a specific module"""
-    try:
-        student = request.user.student
-        
-        is_enrolled = ModuleEnrollment.objects.filter(
-            student=student,
-            module_id=module_id,
-            is_active=True
-        ).exists()
-        
-        return Response({
-            'success': True,
-            'data': {
-                'is_enrolled': is_enrolled,
-                'module_id': module_id
-            },
-            'message': 'Enrollment status retrieved successfully',
-            'request_id': str(uuid.uuid4()),
-            'timestamp': timezone.now().isoformat()
-        }, status=status.HTTP_200_OK)
-        
-    except Exception as e:
-        return Response({
-            'success': False,
-            'data': None,
-            'message': f'Error checking enrollment status: {str(e)}',
-            'request_id': str(uuid.uuid4()),
-            'timestamp': timezone.now().isoformat()
-        }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
\ No newline at end of file
+    student = request.user.student
+    
+    is_enrolled = ModuleEnrollment.objects.filter(
+        student=student,
+        module_id=module_id,
+        is_active=True
+    ).exists()
+    
+    return Response(envelope(
+        True,
+        {'is_enrolled': is_enrolled, 'module_id': module_id},
+        'Enrollment status retrieved successfully'
+    ), status=status.HTTP_200_OK)
\ No newline at end of file
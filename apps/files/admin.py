@@ -2,10 +2,12 @@
 Admin configuration for secure file management
 """
 from django.contrib import admin
+from django.contrib.admin.views.main import ChangeList
 from django.utils.html import format_html
 from django.urls import reverse
 from django.utils.safestring import mark_safe
 from django.db import models
+from django.db.models.functions import Now
 from .models import File, FileAccess, FileAccessLog, FileUploadSession
 
 
@@ -41,12 +43,25 @@ class FileAdmin(admin.ModelAdmin):
         }),
     )
     
+    def get_queryset(self, request):
+        """Annotate download totals so the change list needs no per-row aggregate"""
+        return super().get_queryset(request).annotate(
+            _download_count=models.Sum(
+                'accesses__access_count', filter=models.Q(accesses__access_type='download')
+            )
+        )
+    
     def download_count(self, obj):
         """Show total download count"""
-        return FileAccess.objects.filter(file=obj, access_type='download').aggregate(
-            total=models.Sum('access_count')
-        )['total'] or 0
+        return obj._download_count or 0
     download_count.short_description = 'Downloads'
+    download_count.admin_order_field = '_download_count'
+    
+    def file_size_mb(self, obj):
+        """Show file size in MB"""
+        return obj.file_size_mb
+    file_size_mb.short_description = 'File size mb'
+    file_size_mb.admin_order_field = 'file_size'
 
 
 @admin.register(FileAccess)
@@ -58,6 +73,7 @@ class FileAccessAdmin(admin.ModelAdmin):
     list_filter = ['access_type', 'granted_at', 'expires_at']
     search_fields = ['user__email', 'file__name']
     raw_id_fields = ['file', 'user', 'granted_by']
+    list_select_related = ['file', 'user']
     
     def file_name(self, obj):
         """Show file name"""
@@ -72,6 +88,16 @@ class FileAccessAdmin(admin.ModelAdmin):
     is_expired.short_description = 'Status'
 
 
+class FileAccessLogChangeList(ChangeList):
+    """Load only the listed columns; user agents and error messages stay in the database"""
+    
+    def get_queryset(self, request, *args, **kwargs):
+        return super().get_queryset(request, *args, **kwargs).only(
+            'id', 'action', 'ip_address', 'success', 'response_code', 'timestamp',
+            'user__id', 'user__email', 'file__id', 'file__name'
+        )
+
+
 @admin.register(FileAccessLog)
 class FileAccessLogAdmin(admin.ModelAdmin):
     list_display = [
@@ -81,8 +107,13 @@ class FileAccessLogAdmin(admin.ModelAdmin):
     list_filter = ['action', 'success', 'timestamp', 'response_code']
     search_fields = ['user__email', 'file__name', 'ip_address']
     raw_id_fields = ['file', 'user']
+    list_select_related = ['file', 'user']
     readonly_fields = ['timestamp']
     
+    def get_changelist(self, request, **kwargs):
+        """Narrow the change list query without affecting the change form"""
+        return FileAccessLogChangeList
+    
     def file_name(self, obj):
         """Show file name"""
         return obj.file.name
@@ -106,16 +137,27 @@ class FileUploadSessionAdmin(admin.ModelAdmin):
     list_filter = ['file_type', 'status', 'created_at']
     search_fields = ['user__email', 'file_name']
     raw_id_fields = ['user', 'uploaded_file']
+    list_select_related = ['user']
     readonly_fields = ['id', 'upload_token', 'created_at', 'completed_at']
     
+    def get_queryset(self, request):
+        """Evaluate expiry in the database so the status column can be sorted"""
+        return super().get_queryset(request).annotate(
+            _is_expired=models.ExpressionWrapper(
+                models.Q(expires_at__lt=Now()), output_field=models.BooleanField()
+            )
+        )
+    
     def file_size_mb(self, obj):
         """Show file size in MB"""
         return f"{obj.file_size / (1024 * 1024):.2f} MB"
     file_size_mb.short_description = 'Size (MB)'
+    file_size_mb.admin_order_field = 'file_size'
     
     def is_expired(self, obj):
         """Show if session has expired"""
-        if obj.is_expired:
+        if obj._is_expired:
             return format_html('<span style="color: red;">Expired</span>')
         return format_html('<span style="color: green;">Active</span>')
     is_expired.short_description = 'Status'
+    is_expired.admin_order_field = '_is_expired'
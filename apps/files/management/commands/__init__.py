@@ -0,0 +1 @@
+# Files management commands
@@ -0,0 +1,59 @@
+"""
+Management command to delete old file access logs in batches
+
+Usage:
+    python manage.py prune_file_access_logs [--days=90] [--batch-size=5000] [--dry-run]
+"""
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+from apps.files.models import FileAccessLog
+
+
+class Command(BaseCommand):
+    help = 'Delete file access logs older than a retention window, in batches'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--days',
+            type=int,
+            default=90,
+            help='Keep logs from the last N days (default: 90)',
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=5000,
+            help='Rows deleted per DELETE statement (default: 5000)',
+        )
+        parser.add_argument(
+            '--dry-run',
+            action='store_true',
+            help='Show how many logs would be deleted without deleting',
+        )
+
+    def handle(self, *args, **options):
+        cutoff = timezone.now() - timedelta(days=options['days'])
+        batch_size = options['batch_size']
+        old_logs = FileAccessLog.objects.filter(timestamp__lt=cutoff)
+
+        if options['dry_run']:
+            self.stdout.write(
+                self.style.WARNING(f'DRY RUN: {old_logs.count()} logs older than {cutoff:%Y-%m-%d} would be deleted')
+            )
+            return
+
+        # Short DELETEs walking the timestamp index keep locks and undo logs small
+        deleted_total = 0
+        while True:
+            batch_ids = list(old_logs.order_by('timestamp').values_list('id', flat=True)[:batch_size])
+            if not batch_ids:
+                break
+            deleted, _ = FileAccessLog.objects.filter(id__in=batch_ids).delete()
+            deleted_total += deleted
+            self.stdout.write(f'🗑️  Deleted {deleted_total} logs so far...')
+
+        self.stdout.write(
+            self.style.SUCCESS(f'✅ Deleted {deleted_total} file access logs older than {cutoff:%Y-%m-%d}')
+        )
@@ -0,0 +1,21 @@
+# Generated by Django 5.2.7 on 2026-10-15 12:40
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('files', '0002_alter_fileuploadsession_upload_token'),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='fileaccess',
+            name='file_access_file_id_d5da1c_idx',
+        ),
+        migrations.AddIndex(
+            model_name='fileaccesslog',
+            index=models.Index(fields=['user', 'file', '-timestamp'], name='fal_user_file_ts'),
+        ),
+    ]
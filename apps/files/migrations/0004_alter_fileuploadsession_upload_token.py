@@ -0,0 +1,30 @@
+# Generated by Django 5.2.7 on 2026-10-15 13:30
+
+import secrets
+
+from django.db import migrations, models
+
+
+def replace_upload_tokens(apps, schema_editor):
+    """Swap stored JWTs for short random tokens so they fit the narrower column"""
+    FileUploadSession = apps.get_model('files', 'FileUploadSession')
+    sessions = list(FileUploadSession.objects.only('id'))
+    for session in sessions:
+        session.upload_token = secrets.token_urlsafe(16)
+    FileUploadSession.objects.bulk_update(sessions, ['upload_token'], batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('files', '0003_fileaccess_indexes'),
+    ]
+
+    operations = [
+        migrations.RunPython(replace_upload_tokens, migrations.RunPython.noop),
+        migrations.AlterField(
+            model_name='fileuploadsession',
+            name='upload_token',
+            field=models.CharField(max_length=32, unique=True),
+        ),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 5.2.7 on 2026-10-15 13:45
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('files', '0004_alter_fileuploadsession_upload_token'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='fileaccesslog',
+            index=models.Index(condition=models.Q(('success', False)), fields=['-timestamp'], name='fal_failed_ts'),
+        ),
+    ]
@@ -0,0 +1,34 @@
+# Generated by Django 5.2.7 on 2026-10-15 14:05
+
+import uuid
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    """
+    Move FileAccessLog to a sequential bigint primary key. The existing UUIDs are
+    kept as public_id, so log ids already handed out stay valid.
+    """
+
+    dependencies = [
+        ('files', '0005_fileaccesslog_failed_index'),
+    ]
+
+    operations = [
+        migrations.RenameField(
+            model_name='fileaccesslog',
+            old_name='id',
+            new_name='public_id',
+        ),
+        migrations.AlterField(
+            model_name='fileaccesslog',
+            name='public_id',
+            field=models.UUIDField(default=uuid.uuid4, editable=False, unique=True),
+        ),
+        migrations.AddField(
+            model_name='fileaccesslog',
+            name='id',
+            field=models.BigAutoField(primary_key=True, serialize=False),
+        ),
+    ]
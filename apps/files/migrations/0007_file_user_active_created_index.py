@@ -0,0 +1,17 @@
+# Generated by Django 5.2.7 on 2026-10-15 16:10
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('files', '0006_fileaccesslog_bigint_id'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='file',
+            index=models.Index(fields=['uploaded_by', 'is_active', '-created_at'], name='files_user_active_created_idx'),
+        ),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 5.2.7 on 2026-10-15 16:40
+
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('files', '0007_file_user_active_created_index'),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='fileuploadsession',
+            name='file_upload_upload__83d78c_idx',
+        ),
+    ]
@@ -0,0 +1,21 @@
+# Generated by Django 5.2.7 on 2026-10-15 17:05
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('files', '0008_remove_fileuploadsession_upload_token_index'),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='file',
+            name='files_user_active_created_idx',
+        ),
+        migrations.AddIndex(
+            model_name='file',
+            index=models.Index(fields=['uploaded_by', 'is_active', '-created_at', '-id'], name='files_user_active_created_idx'),
+        ),
+    ]
@@ -73,11 +73,18 @@ class File(models.Model):
             models.Index(fields=['access_level']),
             models.Index(fields=['uploaded_by']),
             models.Index(fields=['created_at']),
+            # list_user_files: uploaded_by + is_active, in its cursor order
+            models.Index(fields=['uploaded_by', 'is_active', '-created_at', '-id'], name='files_user_active_created_idx'),
         ]
     
     def __str__(self):
         return f"{self.name} ({self.file_type})"
     
+    @classmethod
+    def for_listing(cls):
+        """Files without the storage path and encryption key, which listings never show"""
+        return cls.objects.defer('file_path', 'encryption_key')
+    
     @property
     def file_size_mb(self):
         """Return file size in MB"""
@@ -125,8 +132,8 @@ class FileAccess(models.Model):
     class Meta:
         db_table = 'file_accesses'
         unique_together = ['file', 'user', 'access_type']
+        # (file, user) lookups use the unique_together index
         indexes = [
-            models.Index(fields=['file', 'user']),
             models.Index(fields=['expires_at']),
             models.Index(fields=['granted_at']),
         ]
@@ -144,7 +151,10 @@ class FileAccess(models.Model):
 
 class FileAccessLog(models.Model):
     """Log all file access attempts for security monitoring"""
-    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    # Sequential key keeps this append-heavy table's inserts at the end of the index;
+    # public_id is the identifier exposed through the API
+    id = models.BigAutoField(primary_key=True)
+    public_id = models.UUIDField(default=uuid.uuid4, unique=True, editable=False)
     file = models.ForeignKey(File, on_delete=models.CASCADE, related_name='access_logs')
     user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='file_access_logs')
     
@@ -182,6 +192,9 @@ class FileAccessLog(models.Model):
             models.Index(fields=['timestamp']),
             models.Index(fields=['ip_address']),
             models.Index(fields=['success']),
+            models.Index(fields=['user', 'file', '-timestamp'], name='fal_user_file_ts'),
+            # Failed attempts are the usual admin filter; skipped on backends without partial indexes
+            models.Index(fields=['-timestamp'], condition=models.Q(success=False), name='fal_failed_ts'),
         ]
     
     def __str__(self):
@@ -201,7 +214,7 @@ class FileUploadSession(models.Model):
     mime_type = models.CharField(max_length=100)
     
     # Security
-    upload_token = models.CharField(max_length=1000, unique=True)
+    upload_token = models.CharField(max_length=32, unique=True)
     ip_address = models.GenericIPAddressField()
     
     # Status
@@ -232,7 +245,6 @@ class FileUploadSession(models.Model):
         ordering = ['-created_at']
         indexes = [
             models.Index(fields=['user']),
-            models.Index(fields=['upload_token']),
             models.Index(fields=['status']),
             models.Index(fields=['expires_at']),
         ]
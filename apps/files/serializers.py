@@ -39,6 +39,7 @@ class FileAccessSerializer(serializers.ModelSerializer):
 
 class FileAccessLogSerializer(serializers.ModelSerializer):
     """Serializer for FileAccessLog model"""
+    id = serializers.UUIDField(source='public_id', read_only=True)
     
     class Meta:
         model = FileAccessLog
@@ -91,16 +92,6 @@ class CreateUploadSessionSerializer(serializers.Serializer):
             )
         
         return value
-    
-    def validate_file_type(self, value):
-        """Validate file type"""
-        allowed_types = ['video', 'pdf', 'document', 'image', 'audio']
-        if value not in allowed_types:
-            raise serializers.ValidationError(
-                f"File type must be one of: {', '.join(allowed_types)}"
-            )
-        
-        return value
 
 
 class FileAccessRequestSerializer(serializers.Serializer):
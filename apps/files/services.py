@@ -1,13 +1,23 @@
 """
 Secure file service for handling file operations with security
 """
+import atexit
+import io
 import os
 import hashlib
-import jwt
-from datetime import datetime, timedelta
-from typing import Optional, Dict, Any
+import queue
+import secrets
+import threading
+import time
+from collections import OrderedDict
+import certifi
+import urllib3
+from datetime import timedelta
+from typing import Optional, Tuple
 from django.conf import settings
 from django.core.exceptions import PermissionDenied, ValidationError
+from django.db import close_old_connections
+from django.db.models import F, Prefetch
 from django.utils import timezone
 from minio import Minio
 from minio.error import S3Error
@@ -17,32 +27,209 @@ from .models import File, FileAccess, FileAccessLog, FileUploadSession, FileAcce
 
 logger = logging.getLogger(__name__)
 
+# Access log rows are written in batches by a background thread, off the request path
+ACCESS_LOG_BATCH_SIZE = 200
+ACCESS_LOG_FLUSH_SECONDS = 0.5
+# Longest interpreter exit waits for the writer's in-flight batch
+ACCESS_LOG_EXIT_TIMEOUT_SECONDS = 10
+
+# Signed URLs are reused within a process for this long; callers are told
+# the reused URL's remaining lifetime, not the one originally requested
+SIGNED_URL_REUSE_SECONDS = 300
+SIGNED_URL_CACHE_MAX_ENTRIES = 1024
+
+# Read size for checksums where hashlib.file_digest is unavailable
+CHECKSUM_CHUNK_SIZE = io.DEFAULT_BUFFER_SIZE * 16
+
+# Upload session tokens: 16 random bytes, 22 URL-safe characters
+UPLOAD_TOKEN_BYTES = 16
+
+_access_log_queue = queue.Queue()
+_access_log_writer = None
+_access_log_writer_lock = threading.Lock()
+
+
+def _reset_access_log_writer():
+    global _access_log_queue, _access_log_writer, _access_log_writer_lock
+    _access_log_queue = queue.Queue()
+    _access_log_writer = None
+    _access_log_writer_lock = threading.Lock()
+
+
+# Threads do not survive a fork; forked workers start their own writer on first use
+os.register_at_fork(after_in_child=_reset_access_log_writer)
+
+
+def _save_access_logs(batch):
+    """Bulk-insert batch, retrying row by row on failure so a bad row only loses itself"""
+    try:
+        FileAccessLog.objects.bulk_create(batch)
+        return
+    except Exception as e:
+        if len(batch) == 1:
+            logger.error(f"Error logging file access: {e}")
+            return
+        logger.warning(f"Error logging {len(batch)} file accesses, retrying one by one: {e}")
+    for entry in batch:
+        try:
+            FileAccessLog.objects.bulk_create([entry])
+        except Exception as e:
+            logger.error(f"Error logging file access: {e}")
+
+
+def _write_access_logs(log_queue):
+    """Drain queued FileAccessLog rows into bulk INSERTs, forever"""
+    while True:
+        batch = [log_queue.get()]
+        deadline = time.monotonic() + ACCESS_LOG_FLUSH_SECONDS
+        while len(batch) < ACCESS_LOG_BATCH_SIZE:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(log_queue.get(timeout=remaining))
+            except queue.Empty:
+                break
+        
+        try:
+            close_old_connections()
+            _save_access_logs(batch)
+        finally:
+            for _ in batch:
+                log_queue.task_done()
+
+
+def _flush_access_logs():
+    """
+    Write what is still queued at interpreter exit, where the daemon writer would
+    be killed with it, then wait for a batch the writer has already taken
+    """
+    log_queue = _access_log_queue
+    batch = []
+    while True:
+        try:
+            batch.append(log_queue.get_nowait())
+        except queue.Empty:
+            break
+    if batch:
+        try:
+            _save_access_logs(batch)
+        finally:
+            for _ in batch:
+                log_queue.task_done()
+    
+    with log_queue.all_tasks_done:
+        log_queue.all_tasks_done.wait_for(
+            lambda: not log_queue.unfinished_tasks, timeout=ACCESS_LOG_EXIT_TIMEOUT_SECONDS
+        )
+
+
+atexit.register(_flush_access_logs)
+
+
+def queue_access_log(entry: FileAccessLog):
+    """Queue an unsaved FileAccessLog for the background writer, starting it if needed"""
+    global _access_log_writer
+    if _access_log_writer is None:
+        with _access_log_writer_lock:
+            if _access_log_writer is None:
+                _access_log_writer = threading.Thread(
+                    target=_write_access_logs, args=(_access_log_queue,),
+                    name='file-access-log-writer', daemon=True
+                )
+                _access_log_writer.start()
+    _access_log_queue.put(entry)
+
+
+# One MinIO client per process, shared by every service instance and view
+MINIO_MAX_CONNECTIONS = 32
+
+_minio_client = None
+_minio_client_lock = threading.Lock()
+
+
+def get_minio_client() -> Minio:
+    """Return the process-wide MinIO client, creating it on first use"""
+    global _minio_client
+    if _minio_client is None:
+        with _minio_client_lock:
+            if _minio_client is None:
+                # Parse the endpoint URL correctly
+                endpoint_url = settings.MINIO_ENDPOINT_URL
+                if endpoint_url.startswith('http://'):
+                    endpoint = endpoint_url.replace('http://', '')
+                    secure = False
+                elif endpoint_url.startswith('https://'):
+                    endpoint = endpoint_url.replace('https://', '')
+                    secure = True
+                else:
+                    endpoint = endpoint_url
+                    secure = settings.MINIO_USE_HTTPS
+                
+                # Same settings as the SDK's default pool, with room for concurrent requests
+                http_client = urllib3.PoolManager(
+                    timeout=urllib3.Timeout(connect=300, read=300),
+                    maxsize=MINIO_MAX_CONNECTIONS,
+                    cert_reqs='CERT_REQUIRED',
+                    ca_certs=os.environ.get('SSL_CERT_FILE') or certifi.where(),
+                    retries=urllib3.Retry(total=5, backoff_factor=0.2, status_forcelist=[500, 502, 503, 504]),
+                )
+                _minio_client = Minio(
+                    endpoint=endpoint,
+                    access_key=settings.MINIO_ACCESS_KEY,
+                    secret_key=settings.MINIO_SECRET_KEY,
+                    secure=secure,
+                    # A known region lets presigning skip the bucket-location request
+                    region=settings.MINIO_REGION,
+                    http_client=http_client,
+                )
+    return _minio_client
+
+
+class ChecksumReader:
+    """File-like wrapper that SHA-256 hashes everything read through it"""
+    
+    def __init__(self, stream):
+        self._stream = stream
+        self._sha256 = hashlib.sha256()
+    
+    def read(self, size=-1):
+        chunk = self._stream.read(size)
+        self._sha256.update(chunk)
+        return chunk
+    
+    def hexdigest(self) -> str:
+        return self._sha256.hexdigest()
+
 
 class SecureFileService:
     """Service for secure file operations"""
     
     def __init__(self):
-        # Parse the endpoint URL correctly
-        endpoint_url = settings.MINIO_ENDPOINT_URL
-        if endpoint_url.startswith('http://'):
-            endpoint = endpoint_url.replace('http://', '')
-            secure = False
-        elif endpoint_url.startswith('https://'):
-            endpoint = endpoint_url.replace('https://', '')
-            secure = True
-        else:
-            endpoint = endpoint_url
-            secure = settings.MINIO_USE_HTTPS
-        
-        self.minio_client = Minio(
-            endpoint=endpoint,
-            access_key=settings.MINIO_ACCESS_KEY,
-            secret_key=settings.MINIO_SECRET_KEY,
-            secure=secure,
-        )
         self.bucket_name = settings.MINIO_STORAGE_BUCKET_NAME
+        
+        # (file_id, file_path, expires_in) -> (signed_url, monotonic expiry)
+        self._signed_urls = OrderedDict()
+        self._signed_urls_lock = threading.Lock()
+    
+    @property
+    def minio_client(self) -> Minio:
+        return get_minio_client()
     
-    def generate_signed_url(self, file: File, user, access_type: str = 'read', expires_in: int = 3600) -> str:
+    def get_file_for_access(self, file_id, user, **filters) -> File:
+        """
+        Load a file together with the user's explicit access grants on it, so
+        verify_file_access can check them without querying FileAccess again
+        
+        Raises:
+            File.DoesNotExist: If no file matches file_id and filters
+        """
+        return File.objects.prefetch_related(
+            Prefetch('accesses', queryset=FileAccess.objects.filter(user=user), to_attr='user_accesses')
+        ).get(id=file_id, **filters)
+    
+    def generate_signed_url(self, file: File, user, access_type: str = 'read',
+                            expires_in: int = 3600) -> Tuple[str, int]:
         """
         Generate a signed URL for secure file access
         
@@ -53,7 +240,7 @@ class SecureFileService:
             expires_in: URL expiration time in seconds
             
         Returns:
-            Signed URL for file access
+            Signed URL for file access and the seconds it remains valid
             
         Raises:
             PermissionDenied: If user doesn't have access
@@ -65,11 +252,7 @@ class SecureFileService:
         
         try:
             # Generate signed URL
-            signed_url = self.minio_client.presigned_get_object(
-                bucket_name=self.bucket_name,
-                object_name=file.file_path,
-                expires=timedelta(seconds=expires_in)
-            )
+            signed_url, expires_in = self.get_presigned_url(file, expires_in)
             
             # Log successful access
             self.log_access_attempt(file, user, access_type, True)
@@ -77,13 +260,47 @@ class SecureFileService:
             # Update access count
             self.update_access_count(file, user, access_type)
             
-            return signed_url
+            return signed_url, expires_in
             
         except S3Error as e:
             logger.error(f"Error generating signed URL for file {file.id}: {e}")
             self.log_access_attempt(file, user, access_type, False, str(e))
             raise ValidationError("Error generating file access URL")
     
+    def get_presigned_url(self, file: File, expires_in: int) -> Tuple[str, int]:
+        """
+        Return a presigned GET URL for the file and the seconds it remains valid,
+        reusing one signed in the last SIGNED_URL_REUSE_SECONDS. Access must
+        already have been verified.
+        """
+        if expires_in <= 2 * SIGNED_URL_REUSE_SECONDS:
+            return self.minio_client.presigned_get_object(
+                bucket_name=self.bucket_name,
+                object_name=file.file_path,
+                expires=timedelta(seconds=expires_in)
+            ), expires_in
+        
+        key = (file.id, file.file_path, expires_in)
+        now = time.monotonic()
+        with self._signed_urls_lock:
+            cached = self._signed_urls.get(key)
+            if cached and cached[1] - now > expires_in - SIGNED_URL_REUSE_SECONDS:
+                self._signed_urls.move_to_end(key)
+                return cached[0], int(cached[1] - now)
+        
+        signed_url = self.minio_client.presigned_get_object(
+            bucket_name=self.bucket_name,
+            object_name=file.file_path,
+            expires=timedelta(seconds=expires_in)
+        )
+        with self._signed_urls_lock:
+            self._signed_urls[key] = (signed_url, now + expires_in)
+            self._signed_urls.move_to_end(key)
+            # Evict least recently used URLs
+            while len(self._signed_urls) > SIGNED_URL_CACHE_MAX_ENTRIES:
+                self._signed_urls.popitem(last=False)
+        return signed_url, expires_in
+    
     def verify_file_access(self, file: File, user, access_type: str = 'read') -> bool:
         """
         Verify if user has access to the file
@@ -100,6 +317,17 @@ class SecureFileService:
         if not file.is_active or file.is_expired:
             return False
         
+        # Public files with no download limit and no grant of this type, as
+        # preloaded by get_file_for_access, only depend on the file's own switches
+        if (file.access_level == FileAccessLevel.PUBLIC and not file.max_downloads
+                and hasattr(file, 'user_accesses')
+                and not any(a.access_type == access_type for a in file.user_accesses)):
+            if access_type == 'download':
+                return file.allow_download
+            if access_type == 'stream':
+                return file.allow_streaming
+            return True
+        
         # Check access level
         if not self.check_access_level(file, user):
             return False
@@ -134,15 +362,30 @@ class SecureFileService:
         return False
     
     def get_user_role(self, user) -> str:
-        """Determine user role based on related models"""
-        if hasattr(user, 'admin'):
-            return 'admin'
-        elif hasattr(user, 'professor'):
-            return 'professor'
-        elif hasattr(user, 'student'):
-            return 'student'
+        """
+        Determine user role based on related models. Users loaded without the role
+        annotation get it from one joined lookup, remembered on the user instance,
+        since a single access check asks for it several times
+        """
+        # Set by User.objects.with_role(), which the JWT authenticator uses
+        role = getattr(user, 'role', None) or getattr(user, '_file_role', None)
+        if role is not None:
+            return role
+        
+        admin_id, professor_id, student_id = type(user).objects.filter(pk=user.pk).values_list(
+            'admin__id', 'professor__id', 'student__id'
+        ).first() or (None, None, None)
+        if admin_id:
+            role = 'admin'
+        elif professor_id:
+            role = 'professor'
+        elif student_id:
+            role = 'student'
         else:
-            return 'user'
+            role = 'user'
+        
+        user._file_role = role
+        return role
     
     def check_file_access_permissions(self, file: File, user, access_type: str) -> bool:
         """Check specific file access permissions"""
@@ -153,48 +396,46 @@ class SecureFileService:
         if access_type == 'stream' and not file.allow_streaming:
             return False
         
-        # Check for explicit file access grants
-        try:
-            file_access = FileAccess.objects.get(
-                file=file,
-                user=user,
-                access_type=access_type
-            )
-            
-            # Check if access has expired
-            if file_access.is_expired:
-                return False
-            
-            # Check download limits
-            if access_type == 'download' and file.max_downloads:
-                if file_access.access_count >= file.max_downloads:
-                    return False
-            
-            return True
-            
-        except FileAccess.DoesNotExist:
+        # Check for explicit file access grants, preloaded by get_file_for_access when possible
+        if hasattr(file, 'user_accesses'):
+            file_access = next((a for a in file.user_accesses if a.access_type == access_type), None)
+        else:
+            file_access = FileAccess.objects.filter(file=file, user=user, access_type=access_type).first()
+        
+        if file_access is None:
             # No explicit access granted, check if user has general access
             return self.check_access_level(file, user)
+        
+        # Check if access has expired
+        if file_access.is_expired:
+            return False
+        
+        # Check download limits
+        if access_type == 'download' and file.max_downloads:
+            if file_access.access_count >= file.max_downloads:
+                return False
+        
+        return True
     
     def check_content_access(self, file: File, user) -> bool:
         """Check if user has access to the content this file belongs to"""
         # If file is not associated with any content, allow based on access level
-        if not file.course and not file.chapter and not file.lesson:
+        if not file.course_id and not file.chapter_id and not file.lesson_id:
             return self.check_access_level(file, user)
         
         # Check course access
-        if file.course:
+        if file.course_id:
             # Add course access logic here
             # For now, assume user has access if they meet access level
             pass
         
         # Check chapter access
-        if file.chapter:
+        if file.chapter_id:
             # Add chapter access logic here
             pass
         
         # Check lesson access
-        if file.lesson:
+        if file.lesson_id:
             # Add lesson access logic here
             pass
         
@@ -204,7 +445,7 @@ class SecureFileService:
                           error_message: str = None, request=None):
         """Log file access attempt for security monitoring"""
         try:
-            FileAccessLog.objects.create(
+            queue_access_log(FileAccessLog(
                 file=file,
                 user=user,
                 action=action,
@@ -214,26 +455,33 @@ class SecureFileService:
                 success=success,
                 error_message=error_message,
                 response_code=200 if success else 403
-            )
+            ))
         except Exception as e:
             logger.error(f"Error logging file access: {e}")
     
     def update_access_count(self, file: File, user, access_type: str):
         """Update access count for rate limiting"""
         try:
+            now = timezone.now()
+            accesses = FileAccess.objects.filter(file=file, user=user, access_type=access_type)
+            # Increment in the database, so concurrent accesses are all counted
+            if accesses.update(access_count=F('access_count') + 1, last_accessed=now):
+                return
+            
             file_access, created = FileAccess.objects.get_or_create(
                 file=file,
                 user=user,
                 access_type=access_type,
                 defaults={
                     'granted_by': user,
-                    'expires_at': timezone.now() + timedelta(days=30)  # Default 30 days
+                    'expires_at': now + timedelta(days=30),  # Default 30 days
+                    'access_count': 1,
+                    'last_accessed': now
                 }
             )
-            
-            file_access.access_count += 1
-            file_access.last_accessed = timezone.now()
-            file_access.save()
+            if not created:
+                # Another request created the grant in the meantime
+                accesses.update(access_count=F('access_count') + 1, last_accessed=now)
             
         except Exception as e:
             logger.error(f"Error updating access count: {e}")
@@ -258,8 +506,8 @@ class SecureFileService:
     def create_upload_session(self, user, file_name: str, file_size: int, 
                             file_type: str, mime_type: str, request=None) -> FileUploadSession:
         """Create a secure upload session"""
-        # Generate upload token
-        upload_token = self.generate_upload_token(user, file_name, file_size)
+        # Opaque random token; the session row carries everything it stands for
+        upload_token = secrets.token_urlsafe(UPLOAD_TOKEN_BYTES)
         
         # Create upload session
         session = FileUploadSession.objects.create(
@@ -275,46 +523,27 @@ class SecureFileService:
         
         return session
     
-    def generate_upload_token(self, user, file_name: str, file_size: int) -> str:
-        """Generate secure upload token"""
-        payload = {
-            'user_id': str(user.id),
-            'file_name': file_name,
-            'file_size': file_size,
-            'iat': datetime.utcnow(),
-            'exp': datetime.utcnow() + timedelta(hours=1)
-        }
-        
-        return jwt.encode(payload, settings.SECRET_KEY, algorithm='HS256')
-    
-    def verify_upload_token(self, token: str) -> Dict[str, Any]:
-        """Verify upload token and return payload"""
-        try:
-            payload = jwt.decode(token, settings.SECRET_KEY, algorithms=['HS256'])
-            return payload
-        except jwt.ExpiredSignatureError:
-            raise ValidationError("Upload token has expired")
-        except jwt.InvalidTokenError:
-            raise ValidationError("Invalid upload token")
-    
     def calculate_file_checksum(self, file_path: str) -> str:
         """Calculate SHA-256 checksum of file"""
-        sha256_hash = hashlib.sha256()
         with open(file_path, "rb") as f:
-            for chunk in iter(lambda: f.read(4096), b""):
+            if hasattr(hashlib, 'file_digest'):  # Python 3.11+
+                return hashlib.file_digest(f, 'sha256').hexdigest()
+            sha256_hash = hashlib.sha256()
+            for chunk in iter(lambda: f.read(CHECKSUM_CHUNK_SIZE), b""):
                 sha256_hash.update(chunk)
         return sha256_hash.hexdigest()
     
     def detect_suspicious_activity(self, user, file: File) -> bool:
         """Detect suspicious file access patterns"""
-        # Check for too many access attempts in short time
+        # Check for too many access attempts in short time; only whether there are
+        # more than 20 matters, so stop counting at 21
         recent_accesses = FileAccessLog.objects.filter(
             user=user,
             file=file,
             timestamp__gte=timezone.now() - timedelta(minutes=5)
-        ).count()
+        ).order_by().values_list('id', flat=True)[:21]
         
-        if recent_accesses > 20:  # More than 20 accesses in 5 minutes (was too strict at 10)
+        if len(recent_accesses) > 20:  # More than 20 accesses in 5 minutes (was too strict at 10)
             logger.warning(f"Suspicious activity detected for user {user.id} and file {file.id}")
             return True
         
@@ -5,13 +5,48 @@ Usage:
     python manage.py process_recordings [--jibri-volume-path=/path/to/recordings]
 """
 import os
-import glob
+import re
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from django.core.management.base import BaseCommand
-from django.utils import timezone
+from django.db import connection
 from django.db.models import Q
 from apps.lives.models import Live, LiveStatus
 from apps.lives.services import upload_recording_to_minio
 
+# Leading hex characters of a room id used to bucket candidate lives
+ROOM_PREFIX_LENGTH = 8
+
+# Recording names start with the room name: sauvini-live-{id}[-{timestamp}].{ext}
+RECORDING_NAME_RE = re.compile(r'^sauvini-live-([^-.]+)')
+
+# Jitsi recording file extensions
+RECORDING_EXTENSIONS = ('.mp4', '.mkv', '.webm')
+
+
+def walk_recordings(root):
+    """Yield (path, stat_result) for every recording under root, visiting each directory once"""
+    stack = [root]
+    while stack:
+        with os.scandir(stack.pop()) as entries:
+            for entry in entries:
+                # Hidden entries are skipped, as glob did
+                if entry.name.startswith('.'):
+                    continue
+                if entry.is_dir(follow_symlinks=False):
+                    stack.append(entry.path)
+                elif entry.name.endswith(RECORDING_EXTENSIONS):
+                    yield entry.path, entry.stat()
+
+
+def _upload_recording(live, recording_path, filename):
+    """Upload one recording from a worker thread, releasing the thread's DB connection after"""
+    try:
+        return upload_recording_to_minio(live, recording_path, filename)
+    finally:
+        connection.close()
+
+
 class Command(BaseCommand):
     help = 'Process Jitsi recordings from Docker volume and upload to MinIO'
 
@@ -27,10 +62,17 @@ class Command(BaseCommand):
             action='store_true',
             help='Show what would be processed without uploading',
         )
+        parser.add_argument(
+            '--workers',
+            type=int,
+            default=int(os.environ.get('RECORDING_WORKERS', 4)),
+            help='Number of recordings uploaded in parallel (default: RECORDING_WORKERS or 4)',
+        )
 
     def handle(self, *args, **options):
         jibri_path = options['jibri_volume_path']
         dry_run = options['dry_run']
+        workers = max(options['workers'], 1)
 
         # Default paths to check
         default_paths = [
@@ -60,12 +102,8 @@ class Command(BaseCommand):
             )
             return
 
-        # Find all MP4 files (Jitsi recordings)
-        video_extensions = ['*.mp4', '*.mkv', '*.webm']
-        recording_files = []
-        for ext in video_extensions:
-            recording_files.extend(glob.glob(os.path.join(recordings_dir, ext)))
-            recording_files.extend(glob.glob(os.path.join(recordings_dir, '**', ext), recursive=True))
+        # Find all video files (Jitsi recordings)
+        recording_files = list(walk_recordings(recordings_dir))
 
         if not recording_files:
             self.stdout.write(self.style.WARNING('No recording files found'))
@@ -78,7 +116,30 @@ class Command(BaseCommand):
         skipped = 0
         errors = 0
 
-        for recording_path in recording_files:
+        # Load every candidate live once; matching below runs in memory
+        candidates = list(
+            Live.objects.filter(
+                status__in=[LiveStatus.ENDED, LiveStatus.LIVE],
+                ended_at__isnull=False
+            ).select_related('professor__user').order_by('-ended_at')
+        )
+        # ended_at as epoch seconds, compared directly with file mtimes
+        ended_ts = {l.id: l.ended_at.timestamp() for l in candidates}
+        # Room name format: sauvini-live-{uuid_without_dashes}
+        by_room = {
+            l.jitsi_room_name.replace('sauvini-live-', ''): l
+            for l in candidates if l.jitsi_room_name
+        }
+        # Room ids are hex UUIDs, so related ids share their leading characters
+        by_prefix = defaultdict(list)
+        for room_id, l in by_room.items():
+            by_prefix[room_id[:ROOM_PREFIX_LENGTH]].append((room_id, l))
+
+        # Match every file first; lives claimed here count as recorded for later files
+        claimed = set()
+        uploads = []
+
+        for recording_path, recording_stat in recording_files:
             filename = os.path.basename(recording_path)
             self.stdout.write(f'Processing: {filename}')
 
@@ -86,56 +147,41 @@ class Command(BaseCommand):
             # Jitsi recordings are named: {room_name}-{timestamp}.mp4
             # Our room names are: sauvini-live-{live_id}
             live = None
-            if 'sauvini-live-' in filename:
-                # Extract room name part
-                room_part = filename.split('-')[0:3]  # sauvini-live-{id}
-                if len(room_part) >= 3:
-                    room_id_part = room_part[2].replace('.mp4', '').replace('.mkv', '').replace('.webm', '')
-                    # Try to find matching live session
-                    try:
-                        # Search for lives that match this room pattern
-                        # Room name format: sauvini-live-{uuid_without_dashes}
-                        from apps.lives.models import Live
-                        all_lives = Live.objects.filter(
-                            status__in=[LiveStatus.ENDED, LiveStatus.LIVE],
-                            ended_at__isnull=False
-                        ).order_by('-ended_at')
-
-                        # Try to match by room name or time proximity
-                        for l in all_lives:
-                            if l.jitsi_room_name:
-                                room_name_without_prefix = l.jitsi_room_name.replace('sauvini-live-', '')
-                                if room_id_part in room_name_without_prefix or room_name_without_prefix in room_id_part:
-                                    # Check if recording time is close to ended_at time
-                                    file_mod_time = os.path.getmtime(recording_path)
-                                    file_mod_datetime = timezone.datetime.fromtimestamp(file_mod_time, tz=timezone.utc)
-                                    
-                                    if l.ended_at:
-                                        time_diff = abs((file_mod_datetime - l.ended_at).total_seconds())
-                                        if time_diff < 3600:  # Within 1 hour
-                                            live = l
-                                            break
-
-                        if not live:
-                            # If no match found, try the most recent ended live without recording
-                            live = Live.objects.filter(
-                                status=LiveStatus.ENDED,
-                                ended_at__isnull=False,
-                                recording_file__isnull=True
-                            ).order_by('-ended_at').first()
-
-                    except Exception as e:
-                        self.stdout.write(
-                            self.style.WARNING(f'Error matching recording to live: {e}')
-                        )
+            name_match = RECORDING_NAME_RE.match(filename)
+            if name_match:
+                room_id_part = name_match.group(1)
+                file_mod_ts = recording_stat.st_mtime
+
+                def recorded_near(l):
+                    # Recording time must be within 1 hour of ended_at
+                    return abs(file_mod_ts - ended_ts[l.id]) < 3600
+
+                # Exact room match first, then a prefix match in either direction
+                live = by_room.get(room_id_part)
+                if not live or not recorded_near(live):
+                    if len(room_id_part) >= ROOM_PREFIX_LENGTH:
+                        bucket = by_prefix.get(room_id_part[:ROOM_PREFIX_LENGTH], [])
+                    else:
+                        bucket = by_room.items()
+                    live = next(
+                        (
+                            l for room_id, l in bucket
+                            if (room_id.startswith(room_id_part) or room_id_part.startswith(room_id))
+                            and recorded_near(l)
+                        ),
+                        None
+                    )
 
             # If still no match, use most recent ended live without recording
             if not live:
-                live = Live.objects.filter(
-                    status=LiveStatus.ENDED,
-                    ended_at__isnull=False,
-                    recording_file__isnull=True
-                ).order_by('-ended_at').first()
+                live = next(
+                    (
+                        l for l in candidates
+                        if l.status == LiveStatus.ENDED and l.recording_file_id is None
+                        and l.id not in claimed
+                    ),
+                    None
+                )
 
             if not live:
                 self.stdout.write(
@@ -144,13 +190,15 @@ class Command(BaseCommand):
                 skipped += 1
                 continue
 
-            if live.recording_file:
+            if live.recording_file_id or live.id in claimed:
                 self.stdout.write(
                     self.style.WARNING(f'Live {live.id} already has a recording. Skipping.')
                 )
                 skipped += 1
                 continue
 
+            claimed.add(live.id)
+
             if dry_run:
                 self.stdout.write(
                     self.style.SUCCESS(
@@ -160,31 +208,40 @@ class Command(BaseCommand):
                 processed += 1
                 continue
 
-            # Upload recording
-            try:
-                file_obj = upload_recording_to_minio(live, recording_path, filename)
-                if file_obj:
-                    self.stdout.write(
-                        self.style.SUCCESS(
-                            f'✓ Uploaded {filename} to live {live.id} ({live.title})'
+            uploads.append((live, recording_path, filename))
+
+        # Upload matched recordings in parallel; counters are only touched on this thread
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            futures = {
+                executor.submit(_upload_recording, live, recording_path, filename): (live, filename)
+                for live, recording_path, filename in uploads
+            }
+            for future in as_completed(futures):
+                live, filename = futures[future]
+                try:
+                    file_obj = future.result()
+                    if file_obj:
+                        self.stdout.write(
+                            self.style.SUCCESS(
+                                f'✓ Uploaded {filename} to live {live.id} ({live.title})'
+                            )
                         )
-                    )
-                    processed += 1
-                    
-                    # Optionally remove the local file after successful upload
-                    # Uncomment to enable:
-                    # os.remove(recording_path)
-                    # self.stdout.write(f'  Removed local file: {recording_path}')
-                else:
+                        processed += 1
+                        
+                        # Optionally remove the local file after successful upload
+                        # Uncomment to enable:
+                        # os.remove(recording_path)
+                        # self.stdout.write(f'  Removed local file: {recording_path}')
+                    else:
+                        self.stdout.write(
+                            self.style.ERROR(f'Failed to upload {filename}')
+                        )
+                        errors += 1
+                except Exception as e:
                     self.stdout.write(
-                        self.style.ERROR(f'Failed to upload {filename}')
+                        self.style.ERROR(f'Error processing {filename}: {e}')
                     )
                     errors += 1
-            except Exception as e:
-                self.stdout.write(
-                    self.style.ERROR(f'Error processing {filename}: {e}')
-                )
-                errors += 1
 
         # Summary
         self.stdout.write('')
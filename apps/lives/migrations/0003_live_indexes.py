@@ -0,0 +1,21 @@
+# Generated by Django 5.2.7 on 2026-10-15 16:10
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('lives', '0002_add_jitsi_room_name'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='live',
+            index=models.Index(fields=['jitsi_room_name'], name='lives_jitsi_room_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='live',
+            index=models.Index(condition=models.Q(('recording_file__isnull', True)), fields=['status', '-ended_at'], name='lives_unrecorded_ended_idx'),
+        ),
+    ]
@@ -38,6 +38,15 @@ class Live(models.Model):
     class Meta:
         db_table = 'lives'
         ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['jitsi_room_name'], name='lives_jitsi_room_idx'),
+            # process_recordings fallback: most recent ended live without a recording
+            models.Index(
+                fields=['status', '-ended_at'],
+                condition=models.Q(recording_file__isnull=True),
+                name='lives_unrecorded_ended_idx',
+            ),
+        ]
     
     def __str__(self):
         return f"{self.title} - {self.professor.first_name} {self.professor.last_name}"
@@ -1,9 +1,22 @@
+import logging
+
 from rest_framework import serializers
 from .models import Live, LiveComment, LiveStatus
 from apps.courses.serializers import ModuleSerializer, ChapterSerializer
 from apps.courses.models import AcademicStream
 from apps.users.models import Professor
 
+logger = logging.getLogger(__name__)
+
+
+def _resolve_streams(stream_ids):
+    """Fetch the academic streams for stream_ids in one query, logging ids that do not exist"""
+    wanted = {stream_id for stream_id in stream_ids if stream_id}
+    streams = list(AcademicStream.objects.filter(id__in=wanted))
+    for stream_id in wanted - {stream.id for stream in streams}:
+        logger.warning(f"Academic stream with id {stream_id} not found")
+    return streams
+
 
 class ProfessorSerializer(serializers.ModelSerializer):
     """Simple professor serializer for live sessions"""
@@ -11,10 +24,14 @@ class ProfessorSerializer(serializers.ModelSerializer):
         model = Professor
         fields = ['id', 'first_name', 'last_name', 'email']
     
-    email = serializers.SerializerMethodField()
+    email = serializers.EmailField(source='user.email', read_only=True, default=None)
+
+
+class AcademicStreamNameField(serializers.RelatedField):
+    """Read-only academic stream rendered as its name"""
     
-    def get_email(self, obj):
-        return obj.user.email if obj.user else None
+    def to_representation(self, value):
+        return value.name
 
 
 class LiveSerializer(serializers.ModelSerializer):
@@ -25,7 +42,7 @@ class LiveSerializer(serializers.ModelSerializer):
     module_id = serializers.UUIDField(write_only=True, required=False, allow_null=True)
     chapter = ChapterSerializer(read_only=True)
     chapter_id = serializers.UUIDField(write_only=True, required=False, allow_null=True)
-    academic_streams = serializers.SerializerMethodField()
+    academic_streams = AcademicStreamNameField(many=True, read_only=True)
     academic_stream_ids = serializers.ListField(
         child=serializers.UUIDField(),  # Expect UUIDs from frontend
         write_only=True,
@@ -55,11 +72,7 @@ class LiveSerializer(serializers.ModelSerializer):
     
     def get_recording_file(self, obj):
         """Return recording_file ID as string or null"""
-        return str(obj.recording_file.id) if obj.recording_file else None
-    
-    def get_academic_streams(self, obj):
-        """Return academic streams as a list of strings"""
-        return [stream.name for stream in obj.academic_streams.all()]
+        return str(obj.recording_file_id) if obj.recording_file_id else None
     
     def create(self, validated_data):
         # Extract foreign key IDs and many-to-many data
@@ -124,22 +137,9 @@ class LiveSerializer(serializers.ModelSerializer):
             **validated_data
         )
         
-        # Add academic streams using UUIDs (foreign keys)
+        # Add academic streams using UUIDs (foreign keys); unknown ids are skipped
         if academic_stream_ids:
-            stream_objects = []
-            for stream_id in academic_stream_ids:
-                if not stream_id:
-                    continue
-                    
-                try:
-                    stream = AcademicStream.objects.get(id=stream_id)
-                    stream_objects.append(stream)
-                except AcademicStream.DoesNotExist:
-                    # Stream not found - skip this one but don't fail the entire request
-                    import logging
-                    logger = logging.getLogger(__name__)
-                    logger.warning(f"Academic stream with id {stream_id} not found")
-            
+            stream_objects = _resolve_streams(academic_stream_ids)
             if stream_objects:
                 live.academic_streams.set(stream_objects)
         
@@ -154,14 +154,7 @@ class LiveSerializer(serializers.ModelSerializer):
         if 'academic_stream_ids' in validated_data:
             academic_stream_ids = validated_data.pop('academic_stream_ids')
             if academic_stream_ids:
-                stream_objects = []
-                for stream_id in academic_stream_ids:
-                    try:
-                        stream = AcademicStream.objects.get(id=stream_id)
-                        stream_objects.append(stream)
-                    except AcademicStream.DoesNotExist:
-                        # Stream not found - skip this one
-                        continue
+                stream_objects = _resolve_streams(academic_stream_ids)
                 if stream_objects:
                     instance.academic_streams.set(stream_objects)
         
@@ -178,7 +171,7 @@ class LiveListSerializer(serializers.ModelSerializer):
     module_name = serializers.CharField(source='module.name', read_only=True)
     chapter_name = serializers.CharField(source='chapter.name', read_only=True)
     professor_name = serializers.SerializerMethodField()
-    academic_streams = serializers.SerializerMethodField()
+    academic_streams = AcademicStreamNameField(many=True, read_only=True)
     
     class Meta:
         model = Live
@@ -191,9 +184,6 @@ class LiveListSerializer(serializers.ModelSerializer):
     
     def get_professor_name(self, obj):
         return f"{obj.professor.first_name} {obj.professor.last_name}" if obj.professor else None
-    
-    def get_academic_streams(self, obj):
-        return [stream.name for stream in obj.academic_streams.all()]
 
 
 class LiveCommentSerializer(serializers.ModelSerializer):
@@ -1,16 +1,20 @@
 """
 URL configuration for lives app
 """
-from django.urls import path
+from django.urls import include, path
 from . import views
 
+# Actions on a single live, resolved after its lives/<uuid>/ prefix matches once
+live_action_patterns = [
+    path('cancel', views.cancel_live, name='cancel_live'),
+    path('start', views.start_live, name='start_live'),
+    path('end', views.end_live, name='end_live'),
+    path('comments', views.live_comments, name='live_comments'),
+]
+
 urlpatterns = [
     # Live endpoints
     path('lives', views.lives_list_create, name='lives_list_create'),
     path('lives/<uuid:live_id>', views.live_detail, name='live_detail'),
-    path('lives/<uuid:live_id>/cancel', views.cancel_live, name='cancel_live'),
-    path('lives/<uuid:live_id>/start', views.start_live, name='start_live'),
-    path('lives/<uuid:live_id>/end', views.end_live, name='end_live'),
-    path('lives/<uuid:live_id>/comments', views.live_comments, name='live_comments'),
+    path('lives/<uuid:live_id>/', include(live_action_patterns)),
 ]
-
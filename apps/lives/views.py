@@ -9,7 +9,8 @@ from rest_framework.permissions import IsAuthenticated
 from rest_framework.response import Response
 from django.utils import timezone
 from django.shortcuts import get_object_or_404
-from django.db.models import Q
+from django.db.models import Prefetch, Q
+from apps.courses.models import AcademicStream
 from .models import Live, LiveComment, LiveStatus
 from .serializers import LiveSerializer, LiveListSerializer, LiveCommentSerializer
 from core.permissions import IsProfessorUser, IsAdminOrProfessor
@@ -17,6 +18,18 @@ from core.permissions import IsProfessorUser, IsAdminOrProfessor
 logger = logging.getLogger(__name__)
 
 
+def _stream_names():
+    """Prefetch a live's academic streams with only the columns the serializers render"""
+    return Prefetch('academic_streams', queryset=AcademicStream.objects.only('id', 'name'))
+
+
+def _lives_for_serializer():
+    """Lives with every relation LiveSerializer reads joined or prefetched"""
+    return Live.objects.select_related('professor__user', 'module', 'chapter').prefetch_related(
+        _stream_names(), 'module__academic_streams', 'chapter__academic_streams'
+    )
+
+
 @api_view(['GET', 'POST'])
 @permission_classes([IsAdminOrProfessor])
 def lives_list_create(request):
@@ -36,9 +49,14 @@ def lives_list_create(request):
             per_page = int(request.query_params.get('per_page', 20))
             
             # Start with base queryset
+            # Only the columns LiveListSerializer renders, from the live and the joined rows
             queryset = Live.objects.select_related(
                 'professor', 'module', 'chapter'
-            ).prefetch_related('academic_streams')
+            ).only(
+                'id', 'title', 'description', 'scheduled_datetime', 'started_at', 'ended_at',
+                'status', 'recording_url', 'viewer_count', 'created_at', 'updated_at',
+                'module__name', 'chapter__name', 'professor__first_name', 'professor__last_name'
+            ).prefetch_related(_stream_names())
             
             # Apply filters
             if status_filter:
@@ -161,7 +179,7 @@ def lives_list_create(request):
 def live_detail(request, live_id):
     """Get, update, or delete a specific live"""
     try:
-        live = get_object_or_404(Live, id=live_id)
+        live = get_object_or_404(_lives_for_serializer(), id=live_id)
         
         # Check if professor owns this live or is admin
         if hasattr(request.user, 'professor') and request.user.professor:
@@ -228,7 +246,7 @@ def live_detail(request, live_id):
 def cancel_live(request, live_id):
     """Cancel a live session"""
     try:
-        live = get_object_or_404(Live, id=live_id)
+        live = get_object_or_404(_lives_for_serializer(), id=live_id)
         
         # Check ownership
         if live.professor != request.user.professor:
@@ -286,7 +304,7 @@ def cancel_live(request, live_id):
 def start_live(request, live_id):
     """Start a live session"""
     try:
-        live = get_object_or_404(Live, id=live_id)
+        live = get_object_or_404(_lives_for_serializer(), id=live_id)
         
         # Check ownership
         if live.professor != request.user.professor:
@@ -342,7 +360,7 @@ def start_live(request, live_id):
 def end_live(request, live_id):
     """End a live session"""
     try:
-        live = get_object_or_404(Live, id=live_id)
+        live = get_object_or_404(_lives_for_serializer(), id=live_id)
         
         # Check ownership
         if live.professor != request.user.professor:
@@ -411,7 +429,10 @@ def live_comments(request, live_id):
         live = get_object_or_404(Live, id=live_id)
         
         if request.method == 'GET':
-            comments = LiveComment.objects.filter(live=live).select_related('user').order_by('created_at')
+            # get_user_name checks the student and professor profiles of each author
+            comments = LiveComment.objects.filter(live=live).select_related(
+                'user__student', 'user__professor'
+            ).order_by('created_at')
             serializer = LiveCommentSerializer(comments, many=True)
             return Response({
                 'success': True,
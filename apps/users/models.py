@@ -1,12 +1,28 @@
 """
 User models for Student, Professor, and Admin
 """
-from django.contrib.auth.models import AbstractUser
+from django.contrib.auth.models import AbstractUser, UserManager as BaseUserManager
 from django.db import models
 from django.utils import timezone
 import uuid
 
 
+class UserManager(BaseUserManager):
+    """Default user manager with a role-annotated queryset"""
+    
+    def with_role(self):
+        """Users annotated with role ('admin', 'professor', 'student' or 'user') in one query"""
+        return self.get_queryset().annotate(
+            role=models.Case(
+                models.When(admin__isnull=False, then=models.Value('admin')),
+                models.When(professor__isnull=False, then=models.Value('professor')),
+                models.When(student__isnull=False, then=models.Value('student')),
+                default=models.Value('user'),
+                output_field=models.CharField(),
+            )
+        )
+
+
 class User(AbstractUser):
     """Base user model with common fields"""
     id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
@@ -14,6 +30,8 @@ class User(AbstractUser):
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
     
+    objects = UserManager()
+    
     USERNAME_FIELD = 'email'
     REQUIRED_FIELDS = ['username']
     
@@ -0,0 +1,30 @@
+"""
+DRF exception handling
+"""
+import logging
+
+from rest_framework import status
+from rest_framework.response import Response
+from rest_framework.views import exception_handler, set_rollback
+
+from core.responses import envelope
+
+logger = logging.getLogger(__name__)
+
+
+def api_exception_handler(exc, context):
+    """
+    DRF's default handling for API exceptions; anything else that escapes a view
+    becomes a 500 in the standard response envelope instead of Django's HTML page.
+    """
+    response = exception_handler(exc, context)
+    if response is not None:
+        return response
+    
+    request = context.get('request')
+    logger.exception(f"Unhandled error on {request.method} {request.path}" if request else "Unhandled API error")
+    set_rollback()
+    return Response(
+        envelope(False, None, f'Internal server error: {str(exc)}'),
+        status=status.HTTP_500_INTERNAL_SERVER_ERROR
+    )
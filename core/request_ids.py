@@ -0,0 +1,35 @@
+"""
+Buffered random UUIDs for response request_id values
+"""
+import os
+import threading
+
+# 256 UUIDs per os.urandom() call
+BUFFER_SIZE = 4096
+
+_local = threading.local()
+
+
+def _reset_buffer():
+    _local.buffer = b''
+    _local.position = BUFFER_SIZE
+
+
+# Forked workers must not hand out the parent's remaining bytes
+os.register_at_fork(after_in_child=_reset_buffer)
+
+
+def next_uuid_str():
+    """Return a random version 4 UUID string drawn from a per-thread os.urandom buffer"""
+    position = getattr(_local, 'position', BUFFER_SIZE)
+    if position >= BUFFER_SIZE:
+        _local.buffer = os.urandom(BUFFER_SIZE)
+        position = 0
+    raw = bytearray(_local.buffer[position:position + 16])
+    _local.position = position + 16
+    
+    # Set the version (4) and RFC 4122 variant bits, as uuid.uuid4() does
+    raw[6] = (raw[6] & 0x0f) | 0x40
+    raw[8] = (raw[8] & 0x3f) | 0x80
+    h = raw.hex()
+    return f'{h[:8]}-{h[8:12]}-{h[12:16]}-{h[16:20]}-{h[20:]}'
@@ -0,0 +1,17 @@
+"""
+Standard API response envelope
+"""
+from datetime import datetime, timezone
+
+from core.request_ids import next_uuid_str
+
+
+def envelope(success, data, message):
+    """Return the {success, data, message, request_id, timestamp} body every endpoint responds with"""
+    return {
+        'success': success,
+        'data': data,
+        'message': message,
+        'request_id': next_uuid_str(),
+        'timestamp': datetime.now(timezone.utc).isoformat(),
+    }
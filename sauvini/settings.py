@@ -171,6 +171,11 @@ else:
         }
     }
 
+# Keep connections open between requests instead of reconnecting (TCP/TLS/auth) on each one;
+# health checks replace a connection that went away while idle
+DATABASES['default']['CONN_MAX_AGE'] = int(os.getenv('DB_CONN_MAX_AGE', '600'))
+DATABASES['default']['CONN_HEALTH_CHECKS'] = True
+
 # SQLite fallback (commented out)
 # DATABASES = {
 #     'default': {
@@ -179,6 +184,9 @@ else:
 #     }
 # }
 
+# ATOMIC_REQUESTS is intentionally left off: read-only endpoints run in autocommit,
+# and views that write several rows open their own transaction.atomic() block.
+
 
 # Password validation
 # https://docs.djangoproject.com/en/5.2/ref/settings/#auth-password-validators
@@ -239,6 +247,7 @@ REST_FRAMEWORK = {
     'DEFAULT_PAGINATION_CLASS': 'rest_framework.pagination.PageNumberPagination',
     'PAGE_SIZE': 20,
     'DEFAULT_SCHEMA_CLASS': 'drf_spectacular.openapi.AutoSchema',
+    'EXCEPTION_HANDLER': 'core.exceptions.api_exception_handler',
 }
 
 # JWT Configuration (matching Rust backend)
@@ -346,6 +355,7 @@ MINIO_SECRET_KEY = os.getenv('MINIO_SECRET_KEY', 'minioadmin')
 MINIO_ENDPOINT_URL = os.getenv('MINIO_ENDPOINT_URL', 'http://localhost:9000')
 MINIO_STORAGE_BUCKET_NAME = os.getenv('MINIO_STORAGE_BUCKET_NAME', 'sauvini')
 MINIO_USE_HTTPS = os.getenv('MINIO_USE_HTTPS', 'False').lower() == 'true'
+MINIO_REGION = os.getenv('MINIO_REGION') or None  # e.g. us-east-1; avoids a region lookup per new client
 
 # File Security Settings
 MAX_FILE_SIZE_MB = int(os.getenv('MAX_FILE_SIZE_MB', '100'))